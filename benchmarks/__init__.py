@@ -0,0 +1 @@
+"""Airspeed velocity benchmarks of the dmelon numerical kernels."""
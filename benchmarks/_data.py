@@ -0,0 +1,76 @@
+"""
+Synthetic data generators shared by the benchmarks
+"""
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+
+def sea_level(ntime, nlon, lat_bound=15, dlat=0.25, seed=0):
+    """
+    Sea level anomaly field [time, lat, lon] over the equatorial band
+    """
+    rng = np.random.default_rng(seed)
+    lat = np.arange(-lat_bound, lat_bound + dlat / 2, dlat)
+    lon = np.linspace(120, 280, nlon)
+    data = 0.1 * rng.standard_normal((ntime, lat.size, nlon))
+    return xr.DataArray(
+        data,
+        coords=[
+            ("time", pd.date_range("2000-01-01", periods=ntime)),
+            ("lat", lat),
+            ("lon", lon),
+        ],
+    )
+
+
+def time_series(ntime, seed=0):
+    """
+    Red noise daily time series with an ENSO-like oscillation
+    """
+    rng = np.random.default_rng(seed)
+    noise = rng.standard_normal(ntime)
+    data = np.empty(ntime)
+    data[0] = noise[0]
+    for i in range(1, ntime):
+        data[i] = 0.7 * data[i - 1] + noise[i]
+    data += 3 * np.sin(2 * np.pi * np.arange(ntime) / (4 * 365))
+    return xr.DataArray(
+        data,
+        coords=[("time", pd.date_range("1980-01-01", periods=ntime))],
+    )
+
+
+def hovmoller(ntime, nlon, seed=0):
+    """
+    Equatorial [time, lon] field with an eastward propagating signal
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(ntime)[:, np.newaxis]
+    x = np.arange(nlon)[np.newaxis, :]
+    data = np.sin(2 * np.pi * (x / 40 - t / 60)) + rng.standard_normal((ntime, nlon))
+    return xr.DataArray(data, dims=["time", "lon"])
+
+
+def lazy_modes(ntime, nlat, nlon, nmodes=5, chunk=365, seed=0):
+    """
+    Dask backed field [time, lat, lon] of a few modes plus noise, chunked
+    along time and generated chunk by chunk so that it is never in memory
+    """
+    import dask.array as dsa
+
+    rng = dsa.random.default_rng(seed)
+    pcs = rng.standard_normal((ntime, nmodes), chunks=(chunk, -1))
+    patterns = np.random.default_rng(seed).standard_normal((nmodes, nlat * nlon))
+    data = pcs @ patterns + rng.standard_normal(
+        (ntime, nlat * nlon), chunks=(chunk, -1)
+    )
+    return xr.DataArray(
+        data.reshape(ntime, nlat, nlon),
+        coords=[
+            ("time", pd.date_range("2000-01-01", periods=ntime)),
+            ("lat", np.linspace(-60, 60, nlat)),
+            ("lon", np.linspace(0, 360, nlon, endpoint=False)),
+        ],
+    )
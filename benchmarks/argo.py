@@ -0,0 +1,35 @@
+"""
+Benchmarks for the ARGO download planning
+"""
+
+import numpy as np
+import pandas as pd
+
+from dmelon.ocean.argo import build_dl, build_plan
+
+
+class BuildPlan:
+    """
+    Plans for region queries of different sizes
+    """
+
+    params = [10_000, 500_000]
+    param_names = ["nprofiles"]
+
+    def setup(self, nprofiles):
+        """Build a synthetic index with about 100 profiles per float"""
+        rng = np.random.default_rng(0)
+        dacs = np.array(["aoml", "coriolis", "csiro", "jma", "kma", "meds"])
+        wmo = rng.integers(1_900_000, 1_900_000 + nprofiles // 100, nprofiles)
+        dac = dacs[wmo % dacs.size]
+        self.argo_df = pd.DataFrame(
+            {"file": [f"{d}/{w}/profiles/R{w}_001.nc" for d, w in zip(dac, wmo)]},
+        )
+
+    def time_build_plan(self, nprofiles):
+        """Time the plan construction"""
+        build_plan(self.argo_df, "/gdac")
+
+    def time_build_dl(self, nprofiles):
+        """Time the shell commands construction"""
+        build_dl(self.argo_df, "/gdac")
@@ -0,0 +1,74 @@
+"""
+Benchmarks for the BM95 meridional decomposition
+"""
+
+from dmelon.ocean.bm95 import Projection
+
+from ._data import sea_level
+
+
+class Projection95:
+    """
+    Projection of sea level fields of different sizes
+    """
+
+    params = ([365, 3650], [160, 640], [5, 10])
+    param_names = ["ntime", "nlon", "nmodes"]
+    timeout = 300
+
+    def setup(self, ntime, nlon, nmodes):
+        """Build the sea level field"""
+        self.sla = sea_level(ntime, nlon)
+
+    def time_projection(self, ntime, nlon, nmodes):
+        """Time the wave coefficients and decomposed sea level"""
+        Projection(self.sla, nmodes).decomposed_sea_level
+
+    def peakmem_projection(self, ntime, nlon, nmodes):
+        """Peak memory of the wave coefficients and decomposed sea level"""
+        Projection(self.sla, nmodes).decomposed_sea_level
+
+
+class ProjectionBaroclinicModes:
+    """
+    Projection on the first three baroclinic modes, batched or one at a time
+    """
+
+    params = [365, 3650]
+    param_names = ["ntime"]
+    timeout = 300
+    speeds = [2.5, 1.6, 1.0]
+
+    def setup(self, ntime):
+        """Build the sea level field"""
+        self.sla = sea_level(ntime, 160)
+
+    def time_batched(self, ntime):
+        """Time a single projection over every phase speed"""
+        Projection(self.sla, 5, c=self.speeds).decomposed_sea_level
+
+    def time_sequential(self, ntime):
+        """Time one projection per phase speed"""
+        for c in self.speeds:
+            Projection(self.sla, 5, c=c).decomposed_sea_level
+
+
+class ProjectionGroupMasks:
+    """
+    Projection of a field with land, grouping columns by mask pattern
+    """
+
+    params = [365, 3650]
+    param_names = ["ntime"]
+    timeout = 300
+
+    def setup(self, ntime):
+        """Mask the south-eastern corner and a few islands"""
+        sla = sea_level(ntime, 160)
+        land = (sla.lat < -5) & (sla.lon > 260)
+        land |= (abs(sla.lat + 1) < 0.6) & (abs(sla.lon - 270) < 1.5)
+        self.sla = sla.where(~land)
+
+    def time_group_masks(self, ntime):
+        """Time the coefficients solved by mask pattern"""
+        Projection(self.sla, 5, group_masks=True).wave_coefficient_vector
@@ -0,0 +1,18 @@
+"""
+Import time benchmarks
+"""
+
+
+def timeraw_import_dmelon():
+    """Time `import dmelon` in a fresh interpreter"""
+    return "import dmelon"
+
+
+def timeraw_import_spectral():
+    """Time `import dmelon.spectral` in a fresh interpreter"""
+    return "import dmelon.spectral"
+
+
+def timeraw_import_plotting():
+    """Time `import dmelon.plotting` in a fresh interpreter"""
+    return "import dmelon.plotting"
@@ -0,0 +1,57 @@
+"""
+Benchmarks for the machine learning datasets
+"""
+
+import shutil
+import tempfile
+import time
+
+import xarray as xr
+
+from dmelon.ml import ChunkSampler, WindowDataset, normalization_stats
+
+from ._data import sea_level
+
+
+class WindowThroughput:
+    """
+    Samples per second drawn from a zarr store, chunk-aligned against
+    slicing the store in every sample
+    """
+
+    params = [1, 10]
+    param_names = ["steps"]
+    unit = "samples/s"
+    timeout = 300
+
+    def setup(self, steps):
+        """Write a daily field chunked by 32 days to a zarr store"""
+        self.tmp = tempfile.mkdtemp()
+        store = f"{self.tmp}/sla.zarr"
+        sea_level(730, 320).chunk({"time": 32}).to_dataset(name="sla").to_zarr(store)
+        self.da = xr.open_zarr(store)["sla"]
+        self.stats = normalization_stats(self.da)
+
+    def teardown(self, steps):
+        """Remove the store"""
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def track_window_dataset(self, steps):
+        """Samples per second of a shuffled epoch with WindowDataset"""
+        dataset = WindowDataset(self.da, steps=steps, lead=7, stats=self.stats)
+        start = time.perf_counter()
+        for index in ChunkSampler(dataset):
+            dataset[index]
+        return len(dataset) / (time.perf_counter() - start)
+
+    def track_slicing(self, steps):
+        """Samples per second of the same shuffled epoch slicing the store"""
+        dataset = WindowDataset(self.da, steps=steps, lead=7, stats=self.stats)
+        mean, std = self.stats["mean"], self.stats["std"]
+        indices = list(ChunkSampler(dataset))[:200]
+        start = time.perf_counter()
+        for index in indices:
+            x = self.da.isel(time=slice(index, index + steps))
+            y = self.da.isel(time=index + steps - 1 + 7)
+            ((x - mean) / std).values, ((y - mean) / std).values
+        return len(indices) / (time.perf_counter() - start)
@@ -0,0 +1,50 @@
+"""
+Benchmarks for the batch map rendering
+"""
+
+import tempfile
+
+import numpy as np
+
+from dmelon.plotting import render_maps
+
+LON = np.arange(-180, -60, 1.0)
+LAT = np.arange(-30, 30, 1.0)
+
+
+def _draw(ax, frame):
+    """Draw a synthetic daily field"""
+    import cartopy.crs as ccrs
+
+    ax.pcolormesh(LON, LAT, frame, transform=ccrs.PlateCarree(), cmap="RdBu_r")
+
+
+class RenderMaps:
+    """
+    A year of daily maps of the tropical Pacific
+    """
+
+    params = [30, 365]
+    param_names = ["nframes"]
+    timeout = 900
+
+    def setup(self, nframes):
+        """Build the frames and the output folder"""
+        rng = np.random.default_rng(0)
+        self.frames = rng.standard_normal((nframes, LAT.size - 1, LON.size - 1))
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def teardown(self, nframes):
+        """Remove the rendered frames"""
+        self.tmpdir.cleanup()
+
+    def time_render_maps(self, nframes):
+        """Time the parallel rendering with 10m borders"""
+        render_maps(
+            list(self.frames),
+            _draw,
+            self.tmpdir.name,
+            extent=(-180, -60, -30, 30),
+            lon_step=20,
+            lat_step=10,
+        )
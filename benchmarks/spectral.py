@@ -0,0 +1,172 @@
+"""
+Benchmarks for the spectral methods
+"""
+
+from scipy.signal import get_window
+
+from dmelon.spectral.filters import lanczosfilter
+from dmelon.spectral.power import compute_power, multitaper_spectrum, welch_spectrum
+from dmelon.spectral.wavelet import (
+    WaveletMonitor,
+    global_wavelet_spectrum,
+    scale_averaged_power,
+    wavelet,
+    wt,
+)
+
+from ._data import hovmoller, sea_level, time_series
+
+
+class Wavelet:
+    """
+    Wavelet transform of daily series of different lengths
+    """
+
+    params = [3650, 16384, 43800]
+    param_names = ["ntime"]
+    timeout = 300
+
+    def setup(self, ntime):
+        """Build the time series"""
+        self.series = time_series(ntime)
+
+    def time_wavelet(self, ntime):
+        """Time the bare transform with dj=1/12"""
+        wavelet(self.series.data, 1, pad=True, dj=1 / 12)
+
+    def time_wavelet_decimate(self, ntime):
+        """Time the multirate transform with dj=1/12"""
+        wavelet(self.series.data, 1, pad=True, dj=1 / 12, decimate=True)
+
+    def peakmem_wavelet(self, ntime):
+        """Peak memory of the bare transform with dj=1/12"""
+        wavelet(self.series.data, 1, pad=True, dj=1 / 12)
+
+    def peakmem_wavelet_decimate(self, ntime):
+        """Peak memory of the multirate transform with dj=1/12"""
+        wavelet(self.series.data, 1, pad=True, dj=1 / 12, decimate=True)
+
+    def time_wt(self, ntime):
+        """Time the transform with its significance"""
+        wt(self.series, plot=False)
+
+    def peakmem_wt(self, ntime):
+        """Peak memory of the transform with its significance"""
+        wt(self.series, plot=False)
+
+
+class Lanczos:
+    """
+    Lanczos filtering of series of different lengths
+    """
+
+    params = ([3650, 43800], ["low", "high"])
+    param_names = ["ntime", "kind"]
+
+    def setup(self, ntime, kind):
+        """Build the time series"""
+        self.series = time_series(ntime).data
+
+    def time_lanczosfilter(self, ntime, kind):
+        """Time a 90 days filter"""
+        lanczosfilter(self.series, 1 / 90, kind=kind)
+
+    def peakmem_lanczosfilter(self, ntime, kind):
+        """Peak memory of a 90 days filter"""
+        lanczosfilter(self.series, 1 / 90, kind=kind)
+
+
+class ComputePower:
+    """
+    Wavenumber-frequency spectra of Hovmöller diagrams
+    """
+
+    params = ([730, 7300], [160, 640])
+    param_names = ["ntime", "nlon"]
+
+    def setup(self, ntime, nlon):
+        """Build the field and the window"""
+        self.data = hovmoller(ntime, nlon)
+        self.window = get_window("hann", 256)
+
+    def time_compute_power(self, ntime, nlon):
+        """Time the smoothed power spectrum"""
+        compute_power(self.data, self.data.sizes["lon"], 256, 1, 1, self.window, 128)
+
+    def peakmem_compute_power(self, ntime, nlon):
+        """Peak memory of the smoothed power spectrum"""
+        compute_power(self.data, self.data.sizes["lon"], 256, 1, 1, self.window, 128)
+
+
+class GriddedWavelet:
+    """
+    Global wavelet spectrum and ENSO band scale-averaged power of a field
+    """
+
+    params = [(1460, 16), (3650, 64)]
+    param_names = ["shape"]
+    timeout = 300
+
+    def setup(self, shape):
+        """Build a daily field over the equatorial band"""
+        ntime, nlon = shape
+        self.sla = sea_level(ntime, nlon, lat_bound=2, dlat=1)
+
+    def time_global_wavelet_spectrum(self, shape):
+        """Time the spectrum and its significance at every grid point"""
+        global_wavelet_spectrum(self.sla)
+
+    def time_scale_averaged_power(self, shape):
+        """Time the 2-7 year band average at every grid point"""
+        scale_averaged_power(self.sla, [2 * 365, 7 * 365])
+
+
+class OnlineWavelet:
+    """
+    Daily update of a long record, online against a full transform
+    """
+
+    params = [3650, 43800]
+    param_names = ["ntime"]
+    timeout = 300
+
+    def setup(self, ntime):
+        """Start a monitor on the record"""
+        self.series = time_series(ntime + 1)
+        self.monitor = WaveletMonitor(s0=4, J1=96, mean=float(self.series.mean()))
+        self.monitor.extend(self.series.data[:-1])
+
+    def time_update(self, ntime):
+        """Time adding the newest value to the monitor"""
+        self.monitor.update(self.series.data[-1])
+
+    def time_full_transform(self, ntime):
+        """Time the transform of the whole record with the newest value"""
+        wavelet(self.series.data, 1, pad=True, dj=1 / 12, s0=4, J1=96)
+
+
+class GriddedSpectra:
+    """
+    Welch and multitaper spectra of a daily field chunked over space
+    """
+
+    params = [(3650, 64), (3650, 320)]
+    param_names = ["shape"]
+    timeout = 300
+
+    def setup(self, shape):
+        """Build a daily field over the equatorial band"""
+        ntime, nlon = shape
+        self.sla = sea_level(ntime, nlon, lat_bound=5, dlat=0.5).chunk({"lon": 32})
+
+    def time_welch_spectrum(self, shape):
+        """Time the Welch spectra at every grid point"""
+        welch_spectrum(self.sla, nperseg=365).compute()
+
+    def time_multitaper_spectrum(self, shape):
+        """Time the multitaper spectra at every grid point"""
+        multitaper_spectrum(self.sla).compute()
+
+    def peakmem_multitaper_spectrum(self, shape):
+        """Peak memory of the multitaper spectra at every grid point"""
+        multitaper_spectrum(self.sla).compute()
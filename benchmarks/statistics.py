@@ -0,0 +1,83 @@
+"""
+Benchmarks for the statistics module
+"""
+
+import numpy as np
+import xarray as xr
+from scipy.signal import get_window
+
+from dmelon import statistics
+
+from ._data import lazy_modes
+
+
+class TimeEdof:
+    """
+    Effective degrees of freedom for long records with small hops
+    """
+
+    params = ([10_000, 1_000_000], [256, 4096], [0.5, 0.99])
+    param_names = ["N", "nperseg", "fraction"]
+
+    def setup(self, N, nperseg, fraction):
+        """Build the window"""
+        self.window = get_window("hann", nperseg)
+        self.overlap = int(nperseg * fraction)
+
+    def time_edof(self, N, nperseg, fraction):
+        """Time a single edof evaluation"""
+        statistics.edof(N, self.window, self.overlap)
+
+    def peakmem_edof(self, N, nperseg, fraction):
+        """Peak memory of a single edof evaluation"""
+        statistics.edof(N, self.window, self.overlap)
+
+
+class TimeSignificanceMap:
+    """
+    Correlation significance map over a dask backed field
+    """
+
+    params = [(180, 90, 180), (365, 180, 360)]
+    param_names = ["shape"]
+
+    def setup(self, shape):
+        """Build two synthetic fields"""
+        rng = np.random.default_rng(0)
+        dims = ["time", "lat", "lon"]
+        chunks = {"time": -1, "lat": 45, "lon": 90}
+        self.x = xr.DataArray(rng.standard_normal(shape), dims=dims).chunk(chunks)
+        self.y = xr.DataArray(rng.standard_normal(shape), dims=dims).chunk(chunks)
+
+    def time_correlation_significance(self, shape):
+        """Time the full significance map"""
+        statistics.correlation_significance(self.x, self.y).compute()
+
+
+class TimeEOF:
+    """
+    Leading EOFs of a dask backed field chunked along time
+
+    The field is generated chunk by chunk, so the peak memory is the one of
+    the EOF engine alone and must stay at a few chunks, well below the size
+    of the field (about 0.5 GB for the largest shape).
+    """
+
+    params = (["tsqr", "randomized"], [(3650, 15, 20), (3650, 90, 180)])
+    param_names = ["method", "shape"]
+    timeout = 600
+
+    def setup(self, method, shape):
+        """Build a lazy field of a few modes plus noise"""
+        nt, ny, nx = shape
+        if method == "tsqr" and ny * nx > 365:
+            raise NotImplementedError("The R factor would be larger than a chunk")
+        self.da = lazy_modes(nt, ny, nx, chunk=365)
+
+    def time_eof(self, method, shape):
+        """Time the ten leading modes"""
+        statistics.eof(self.da, neofs=10, method=method)
+
+    def peakmem_eof(self, method, shape):
+        """Peak memory of the ten leading modes"""
+        statistics.eof(self.da, neofs=10, method=method)
@@ -0,0 +1,48 @@
+"""
+Benchmarks for the helper functions
+"""
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from shapely.geometry import box
+
+from dmelon.utils import findPointsInPolys
+
+
+class FindPointsInPolys:
+    """
+    Regional queries over synthetic ARGO indexes
+    """
+
+    params = [10_000, 100_000, 1_000_000, 5_000_000]
+    param_names = ["nrows"]
+    timeout = 300
+
+    def setup(self, nrows):
+        """Build the index and the Niño regions"""
+        rng = np.random.default_rng(0)
+        self.argo_df = pd.DataFrame(
+            {
+                "longitude": rng.uniform(-180, 180, nrows),
+                "latitude": rng.uniform(-80, 80, nrows),
+            },
+        )
+        self.regions = gpd.GeoDataFrame(
+            {"region": ["nino12", "nino3", "nino34", "nino4"]},
+            geometry=[
+                box(-90, -10, -80, 0),
+                box(-150, -5, -90, 5),
+                box(-170, -5, -120, 5),
+                box(160, -5, 180, 5),
+            ],
+            crs="EPSG:4326",
+        )
+
+    def time_findPointsInPolys(self, nrows):
+        """Time the regional query"""
+        findPointsInPolys(self.argo_df, self.regions)
+
+    def peakmem_findPointsInPolys(self, nrows):
+        """Peak memory of the regional query"""
+        findPointsInPolys(self.argo_df, self.regions)
@@ -3,20 +3,52 @@ Command line utility to call ARGO GDAC updates on demand
 """
 
 import argparse
+import json
+import os
+import sys
+import time
+from functools import partial
 
-from dmelon.ocean.argo import build_dl, launch_shell
+from dmelon.ocean.argo import (
+    ARGO_LOCAL_FTP,
+    ArgoState,
+    ArgoSync,
+    build_plan,
+    estimate_transfer,
+)
 
-ARGO_localFTP = "/data/datos/ARGO/gdac"
+ARGO_localFTP = ARGO_LOCAL_FTP
 
 
-def main(kind, args):
+def main(
+    kind,
+    args,
+    incremental=False,
+    dry_run=False,
+    max_transfers=8,
+    target=None,
+    state_path=None,
+    json_path=None,
+):
     """
-    Build and run the download script for ARGO GDAC data
+    Mirror the ARGO GDAC folders of the selected floats, or only their
+    new and modified profiles in incremental mode
+
+    With ``json_path="-"`` the summary is the only output on stdout, the
+    messages and progress go to stderr
     """
     import argopy
     from argopy import IndexFetcher as ArgoIndexFetcher
 
-    argopy.set_options(src="localftp", local_ftp=ARGO_localFTP)
+    # keep stdout for the json summary when it is written there
+    log = partial(print, file=sys.stderr if json_path == "-" else sys.stdout)
+    if target is None:
+        target = ARGO_localFTP
+    if state_path is None:
+        state_path = os.path.join(target, "argo_state.sqlite")
+
+    start = time.perf_counter()
+    argopy.set_options(src="localftp", local_ftp=target)
     argopy.set_options(mode="expert")
     index_loader = ArgoIndexFetcher()
 
@@ -28,14 +60,47 @@ def main(kind, args):
             float(args[3]),
             *args[4:],
         ]
-        print(region)
+        log(region)
         argo_df = index_loader.region(region).to_dataframe()
     elif kind == "floats":
         argo_df = index_loader.float(args).to_dataframe()
-    dl_list = build_dl(argo_df, ARGO_localFTP)
-    print("Download commands built, launching subshell")
-    launch_shell(dl_list)
-    print("Done")
+    report = {
+        "kind": kind,
+        "mode": "incremental" if incremental else "full",
+        "target": target,
+        "index_seconds": time.perf_counter() - start,
+    }
+
+    state = ArgoState(state_path) if incremental else None
+    if dry_run:
+        report.update(estimate_transfer(argo_df, target, state=state))
+        log(
+            f"Plan: {report['floats']} floats, {report['files']} files, "
+            f"~{report['estimated_bytes'] / 1e6:.1f} MB",
+        )
+    else:
+        engine = ArgoSync(local_root=target, max_workers=max_transfers, progress=log)
+        if incremental:
+            summary = engine.sync_incremental(argo_df, state)
+        else:
+            plan = build_plan(argo_df, target)
+            log(f"Syncing {len(plan)} floats")
+            summary = engine.sync(plan)
+        report.update(summary)
+        report["sync_seconds"] = report.pop("elapsed")
+        log(
+            f"Done: {summary['downloaded']} files downloaded ({summary['bytes']} bytes), "
+            f"{len(summary['failed'])} failed in {report['sync_seconds']:.1f}s",
+        )
+    report["total_seconds"] = time.perf_counter() - start
+
+    if json_path == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif json_path is not None:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
 
 
 def getArgs(argv=None):
@@ -52,9 +117,55 @@ def getArgs(argv=None):
         choices=["region", "floats"],
     )
     parser.add_argument("-l", "--list", nargs="+", help="other args", required=True)
+    parser.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        help="only download the profiles that are new or updated in the index",
+    )
+    parser.add_argument(
+        "-n",
+        "--dry-run",
+        action="store_true",
+        help="only report the number of floats, files and estimated bytes, counting "
+        "whole float folders unless incremental",
+    )
+    parser.add_argument(
+        "-j",
+        "--max-transfers",
+        type=int,
+        default=8,
+        help="maximum number of parallel transfers",
+    )
+    parser.add_argument(
+        "-d",
+        "--target",
+        default=ARGO_localFTP,
+        help="local copy of the GDAC",
+    )
+    parser.add_argument(
+        "-s",
+        "--state",
+        default=None,
+        help="state database of the incremental mode, inside the target by default",
+    )
+    parser.add_argument(
+        "--json",
+        default=None,
+        help="write a json summary of the run to this file, '-' for stdout",
+    )
     return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
     args = getArgs()
-    main(args.kind, args.list)
+    main(
+        args.kind,
+        args.list,
+        incremental=args.incremental,
+        dry_run=args.dry_run,
+        max_transfers=args.max_transfers,
+        target=args.target,
+        state_path=args.state,
+        json_path=args.json,
+    )
@@ -2,12 +2,16 @@
 Top-level package for DMelon.
 """
 
+from ._lazy import lazy_submodules
+
 try:
     from ._version import __version__
 except ImportError:
     __version__ = "unknown"
 
 
-# from . import ml, ocean, plotting, spectral, statistics, utils
+# submodules are imported on first access, see dmelon._lazy
+__all__ = ["cmip6", "ml", "ocean", "plotting", "spectral", "statistics", "utils"]
+
 
-__all__ = ["ml", "ocean", "plotting", "spectral", "statistics", "utils"]
+__getattr__, __dir__ = lazy_submodules(globals())
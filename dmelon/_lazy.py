@@ -0,0 +1,42 @@
+"""
+Lazy import of the submodules of a package
+"""
+
+import importlib
+
+
+def lazy_submodules(namespace):
+    """
+    Module level ``__getattr__`` and ``__dir__`` of a package that imports
+    the submodules listed in its ``__all__`` on first access
+
+    Parameters
+    ----------
+    namespace : dict
+        ``globals()`` of the package, holding ``__name__`` and ``__all__``
+
+    Returns
+    -------
+    tuple of function
+        ``(__getattr__, __dir__)``
+    """
+    package = namespace["__name__"]
+    submodules = namespace["__all__"]
+
+    def __getattr__(name):
+        """
+        Import the submodules listed in __all__ when first accessed
+        """
+        if name in submodules:
+            module = importlib.import_module(f".{name}", package)
+            namespace[name] = module
+            return module
+        raise AttributeError(f"module {package!r} has no attribute {name!r}")
+
+    def __dir__():
+        """
+        List the lazily imported submodules along with the module attributes
+        """
+        return sorted(set(namespace) | set(submodules))
+
+    return __getattr__, __dir__
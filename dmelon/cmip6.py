@@ -0,0 +1,157 @@
+"""
+Batch preprocessing of CMIP6 model outputs into zarr stores
+"""
+
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional, Sequence, Union
+
+import dask
+import pandas as pd
+import xarray as xr
+
+from .utils import check_folder, load_json, replace_x_y_nominal_lat_lon
+
+DONE_MANIFEST = "done.json"
+
+
+def _expand_paths(paths: Union[str, Sequence[str]]) -> list:
+    """
+    Expand a path, glob pattern or list of them into a sorted list of files
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    files = []
+    for path in paths:
+        files.extend(sorted(glob.glob(path)) or [path])
+    return files
+
+
+def preprocess_dataset(
+    name: str,
+    paths: Union[str, Sequence[str]],
+    output_dir: str,
+    region: Optional[dict] = None,
+) -> dict:
+    """
+    Open a single model dataset, replace its x and y with nominal lon/lat
+    values, optionally subset a region and write it to a zarr store
+
+    Parameters
+    ----------
+    name : str
+        Name of the dataset, used for the zarr store
+    paths : str or list of str
+        Files, or glob patterns, that make up the dataset
+    output_dir : str
+        Folder where the zarr store is written
+    region : dict, optional
+        Bounds to keep in the nominal coordinates, as
+        ``{"lon": (west, east), "lat": (south, north)}``
+    """
+    start = time.perf_counter()
+    store = os.path.join(output_dir, f"{name}.zarr")
+    # the parallelism is over datasets, each worker computes serially
+    with dask.config.set(scheduler="synchronous"):
+        with xr.open_mfdataset(_expand_paths(paths)) as ds:
+            ds = replace_x_y_nominal_lat_lon(ds)
+            if region is not None:
+                ds = ds.sel(x=slice(*region["lon"]), y=slice(*region["lat"]))
+            ds.to_zarr(store, mode="w")
+    return {
+        "store": store,
+        "elapsed": time.perf_counter() - start,
+        "finished": pd.Timestamp.now().isoformat(),
+    }
+
+
+def _load_done(done_path: str) -> dict:
+    """
+    Load the manifest of the datasets already processed
+    """
+    if os.path.exists(done_path):
+        return load_json(done_path)
+    return {}
+
+
+def _write_done(done: dict, done_path: str) -> None:
+    """
+    Atomically write the manifest of the datasets already processed
+    """
+    tmp_path = f"{done_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(done, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, done_path)
+
+
+def preprocess_manifest(
+    manifest: Union[str, dict],
+    output_dir: str,
+    region: Optional[dict] = None,
+    max_workers: Optional[int] = None,
+    overwrite: bool = False,
+) -> dict:
+    """
+    Preprocess every dataset of a manifest in a pool of worker processes
+
+    Parameters
+    ----------
+    manifest : str or dict
+        Mapping, or path to a json file with it, of dataset names to the
+        files or glob patterns of each dataset
+    output_dir : str
+        Folder where the zarr stores and the ``done.json`` manifest
+        are written
+    region : dict, optional
+        Bounds passed down to `preprocess_dataset`
+    max_workers : int, optional
+        Number of worker processes
+    overwrite : bool
+        Reprocess the datasets already listed in ``done.json``
+
+    Returns
+    -------
+    dict
+        Datasets processed in this run with their zarr store and time
+        taken, the ones skipped and the ones that failed with their error
+    """
+    if isinstance(manifest, str):
+        manifest = load_json(manifest)
+    check_folder(output_dir)
+    done_path = os.path.join(output_dir, DONE_MANIFEST)
+    done = _load_done(done_path)
+
+    pending = {
+        name: paths
+        for name, paths in manifest.items()
+        if overwrite or name not in done or not os.path.exists(done[name]["store"])
+    }
+    summary = {
+        "processed": {},
+        "skipped": sorted(set(manifest) - set(pending)),
+        "failed": {},
+    }
+    if not pending:
+        return summary
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(preprocess_dataset, name, paths, output_dir, region): name
+            for name, paths in pending.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                result = future.result()
+            except Exception as err:
+                summary["failed"][name] = repr(err)
+                continue
+            print(f"{name} done in {result['elapsed']:.1f}s")
+            done[name] = result
+            summary["processed"][name] = result
+            # keep the manifest current so interrupted runs can resume
+            _write_done(done, done_path)
+    return summary
@@ -2,6 +2,7 @@
 Machine learning module containing useful function or classes
 """
 
+from .datasets import ChunkSampler, WindowDataset, normalization_stats
 from .pytorchtools import EarlyStopping
 
-__all__ = ["EarlyStopping"]
+__all__ = ["ChunkSampler", "EarlyStopping", "WindowDataset", "normalization_stats"]
@@ -0,0 +1,285 @@
+"""
+PyTorch datasets over gridded xarray/zarr fields
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import torch
+import xarray as xr
+from torch.utils.data import Dataset, Sampler
+
+DEFAULT_CHUNK_SIZE = 128
+
+
+def normalization_stats(da: xr.DataArray, dim: str = "time") -> xr.Dataset:
+    """
+    Mean and standard deviation along ``dim`` computed in a single pass
+
+    Compute them once on the training period and pass them to every
+    :class:`WindowDataset` so that the validation and test sets share them.
+
+    Parameters
+    ----------
+    da : xr.DataArray
+        Field to normalize, possibly dask backed
+    dim : str
+        Dimension reduced by the statistics
+
+    Returns
+    -------
+    xr.Dataset
+        ``mean`` and ``std`` with the remaining dimensions of ``da``
+    """
+    stats = xr.Dataset({"mean": da.mean(dim), "std": da.std(dim)})
+    return stats.compute()
+
+
+def _time_chunk_size(da: xr.DataArray, dim: str) -> int:
+    """
+    Size of the chunks of ``da`` along ``dim``, from dask or the zarr encoding
+    """
+    axis = da.get_axis_num(dim)
+    if da.chunks is not None:
+        return int(da.chunks[axis][0])
+    if "chunks" in da.encoding:
+        return int(da.encoding["chunks"][axis])
+    return DEFAULT_CHUNK_SIZE
+
+
+class WindowDataset(Dataset):
+    """
+    Samples of ``steps`` consecutive fields with targets at lead times
+
+    The field is read one time chunk at a time, normalized and kept in a
+    per-process LRU cache, so that a sample never triggers a small read of
+    its own. Samples are numbered by their first time step, use
+    :class:`ChunkSampler` to draw them chunk by chunk.
+
+    Args:
+        da (xr.DataArray): Input field with a ``dim`` dimension, usually (time, lat, lon).
+        steps (int): Number of time steps of each input window.
+                        Default: 1
+        lead (int or sequence of int): Lead time(s) of the targets, counted from the
+                        last input step.
+                        Default: 1
+        target (xr.DataArray): Field to predict, sharing ``dim`` with ``da``.
+                        Default: ``da``
+        stats (xr.Dataset): ``mean`` and ``std`` of the input, see :func:`normalization_stats`.
+                        Default: computed on ``da``
+        target_stats (xr.Dataset): Same for the target.
+                        Default: ``stats`` if there is no separate target
+        dim (str): Time dimension.
+                        Default: 'time'
+        chunk_size (int): Number of time steps read at once.
+                        Default: the dask or zarr chunking of ``da`` along ``dim``
+        cache_size (int): Number of decoded chunks kept in memory per process.
+                        Default: 8
+        prefetch (bool): If True, reads the chunk after the current one in the
+                        background.
+                        Default: True
+        fill_value (float): Value given to missing data after normalization.
+                        Default: 0.0
+    """
+
+    def __init__(
+        self,
+        da: xr.DataArray,
+        steps: int = 1,
+        lead: Union[int, Sequence[int]] = 1,
+        target: Optional[xr.DataArray] = None,
+        stats: Optional[xr.Dataset] = None,
+        target_stats: Optional[xr.Dataset] = None,
+        dim: str = "time",
+        chunk_size: Optional[int] = None,
+        cache_size: int = 8,
+        prefetch: bool = True,
+        fill_value: float = 0.0,
+    ):
+        if stats is None:
+            stats = normalization_stats(da, dim)
+        if target is None:
+            target = da
+            target_stats = stats if target_stats is None else target_stats
+        elif target_stats is None:
+            target_stats = normalization_stats(target, dim)
+        if target.sizes[dim] != da.sizes[dim]:
+            raise ValueError(f"'da' and 'target' must have the same '{dim}' size")
+
+        self.steps = steps
+        self.scalar_lead = np.ndim(lead) == 0
+        self.lead = np.atleast_1d(lead).astype(int)
+        self.dim = dim
+        self.chunk_size = chunk_size or _time_chunk_size(da, dim)
+        self.cache_size = cache_size
+        self.prefetch = prefetch
+        self.fill_value = fill_value
+        self.ntime = da.sizes[dim]
+        self._sources = [self._source(da, stats)]
+        if target is da and target_stats is stats:
+            self._target = 0
+        else:
+            self._target = 1
+            self._sources.append(self._source(target, target_stats))
+        self._next_chunk = None
+        self._local = None
+
+    def _source(self, da, stats):
+        """Field with ``dim`` first and its statistics as float32 arrays"""
+        da = da.transpose(self.dim, ...)
+        mean = stats["mean"].transpose(*da.dims[1:]).values.astype(np.float32)
+        std = stats["std"].transpose(*da.dims[1:]).values.astype(np.float32)
+        return da, mean, np.where(std > 0, std, 1).astype(np.float32)
+
+    def __len__(self):
+        """Number of complete samples"""
+        return max(self.ntime - self.steps - int(self.lead.max()) + 1, 0)
+
+    @property
+    def nchunks(self):
+        """Number of time chunks"""
+        return -(-self.ntime // self.chunk_size)
+
+    def chunk_of(self, index):
+        """Chunk holding the first time step of a sample"""
+        return index // self.chunk_size
+
+    def set_chunk_order(self, order):
+        """
+        Order in which the chunks will be visited, used to prefetch the next one
+        """
+        order = np.asarray(order)
+        self._next_chunk = dict(zip(order[:-1].tolist(), order[1:].tolist()))
+
+    def __getstate__(self):
+        """State sent to the workers, without the cache and its thread"""
+        state = self.__dict__.copy()
+        state["_local"] = None
+        return state
+
+    def _state(self):
+        """Cache and prefetch thread of the current process"""
+        pid = os.getpid()
+        if self._local is None or self._local["pid"] != pid:
+            self._local = {
+                "pid": pid,
+                "cache": OrderedDict(),
+                "lock": threading.Lock(),
+                "executor": ThreadPoolExecutor(max_workers=1),
+            }
+        return self._local
+
+    def _read(self, source, chunk):
+        """Read and normalize a single chunk"""
+        da, mean, std = self._sources[source]
+        start = chunk * self.chunk_size
+        block = da[start : start + self.chunk_size].values.astype(np.float32)
+        block = (block - mean) / std
+        block[np.isnan(block)] = self.fill_value
+        return block
+
+    def _chunk(self, source, chunk, wait=True):
+        """Decoded chunk, read at most once while it stays in the cache"""
+        state = self._state()
+        key = (source, chunk)
+        with state["lock"]:
+            future = state["cache"].get(key)
+            if future is None:
+                future = state["executor"].submit(self._read, source, chunk)
+                state["cache"][key] = future
+                while len(state["cache"]) > self.cache_size:
+                    state["cache"].popitem(last=False)
+            else:
+                state["cache"].move_to_end(key)
+        return future.result() if wait else None
+
+    def _slice(self, source, start, stop):
+        """
+        Time steps ``start:stop`` of a source, across chunk boundaries,
+        always copied so that samples never share memory with the cache
+        """
+        first, last = start // self.chunk_size, (stop - 1) // self.chunk_size
+        parts = []
+        for chunk in range(first, last + 1):
+            offset = chunk * self.chunk_size
+            block = self._chunk(source, chunk)
+            parts.append(block[max(start - offset, 0) : stop - offset])
+        return parts[0].copy() if len(parts) == 1 else np.concatenate(parts)
+
+    def _prefetch(self, chunk):
+        """Start reading the chunk visited after ``chunk``"""
+        if self._next_chunk is not None:
+            chunk = self._next_chunk.get(chunk)
+        else:
+            chunk = chunk + 1 if chunk + 1 < self.nchunks else None
+        if chunk is not None:
+            for source in range(len(self._sources)):
+                self._chunk(source, chunk, wait=False)
+
+    def __getitem__(self, index):
+        """Input window and targets of a sample as float32 tensors"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        if self.prefetch:
+            self._prefetch(self.chunk_of(index))
+        x = self._slice(0, index, index + self.steps)
+        times = index + self.steps - 1 + self.lead
+        y = self._slice(self._target, int(times.min()), int(times.max()) + 1)
+        y = y[times - times.min()]
+        if self.scalar_lead:
+            y = y[0]
+        return torch.from_numpy(x), torch.from_numpy(y)
+
+
+class ChunkSampler(Sampler):
+    """
+    Draws all the samples of a chunk before moving to the next one
+
+    Chunks and the samples inside them are shuffled with a generator seeded
+    by ``seed + epoch``. Call :meth:`set_epoch` before iterating the
+    ``DataLoader`` so that workers started for that epoch prefetch in the
+    same order.
+
+    Args:
+        dataset (WindowDataset): Dataset to sample.
+        shuffle (bool): If True, shuffles the chunks and the samples in each chunk.
+                        Default: True
+        seed (int): Seed of the shuffling.
+                        Default: 0
+    """
+
+    def __init__(self, dataset: WindowDataset, shuffle: bool = True, seed: int = 0):
+        self.dataset = dataset
+        self.shuffle = shuffle
+        self.seed = seed
+        self.set_epoch(0)
+
+    def set_epoch(self, epoch):
+        """Fix the order for an epoch"""
+        self.epoch = epoch
+        nchunks = (
+            self.dataset.chunk_of(len(self.dataset) - 1) + 1 if len(self.dataset) else 0
+        )
+        rng = np.random.default_rng(self.seed + epoch)
+        self.order = rng.permutation(nchunks) if self.shuffle else np.arange(nchunks)
+        self.dataset.set_chunk_order(self.order)
+
+    def __iter__(self):
+        """Sample indices of the current epoch, chunk by chunk"""
+        rng = np.random.default_rng([self.seed, self.epoch])
+        size = self.dataset.chunk_size
+        for chunk in self.order:
+            index = np.arange(chunk * size, min((chunk + 1) * size, len(self.dataset)))
+            if self.shuffle:
+                rng.shuffle(index)
+            yield from index.tolist()
+
+    def __len__(self):
+        """Number of samples drawn per epoch"""
+        return len(self.dataset)
@@ -2,12 +2,22 @@
 Taken from https://github.com/Bjarten/early-stopping-pytorch
 """
 
+import atexit
+import os
+import threading
+import time
+
 import numpy as np
 import torch
 
 
 class EarlyStopping:
-    """Early stops the training if validation loss doesn't improve after a given patience."""
+    """Early stops the training if validation loss doesn't improve after a given patience.
+
+    With `async_save`, use it as a context manager or call `close` when the
+    training ends so that the last best state is on disk. An `atexit` hook
+    does it as a last resort when the interpreter exits.
+    """
 
     def __init__(
         self,
@@ -16,6 +26,8 @@ class EarlyStopping:
         delta=0,
         path="checkpoint.pt",
         trace_func=print,
+        async_save=False,
+        report_cost=None,
     ):
         """
         Args:
@@ -29,16 +41,33 @@ class EarlyStopping:
                             Default: 'checkpoint.pt'
             trace_func (function): trace print function.
                             Default: print
+            async_save (bool): If True, keeps the best state as a CPU copy in `best_state`
+                            and writes it to disk from a background thread. Call `flush`
+                            to wait for the last write, which happens on stop, and `close`
+                            at the end of training.
+                            Default: False
+            report_cost (bool): If True, reports the time taken by each checkpoint through
+                            `trace_func`.
+                            Default: ``async_save``
         """
         self.patience = patience
         self.verbose = verbose
         self.counter = 0
         self.best_score = None
         self.early_stop = False
-        self.val_loss_min = np.Inf
+        self.val_loss_min = np.inf
         self.delta = delta
         self.path = path
         self.trace_func = trace_func
+        self.async_save = async_save
+        self.report_cost = async_save if report_cost is None else report_cost
+        self.best_state = None
+        self._pending = None
+        self._writing = False
+        self._error = None
+        self._writer = None
+        self._closed = False
+        self._cond = threading.Condition()
 
     def __call__(self, val_loss, model):
         """
@@ -58,6 +87,7 @@ class EarlyStopping:
             )
             if self.counter >= self.patience:
                 self.early_stop = True
+                self.flush()
         else:
             self.best_score = score
             self.save_checkpoint(val_loss, model)
@@ -69,5 +99,88 @@ class EarlyStopping:
             self.trace_func(
                 f"Validation loss decreased ({self.val_loss_min:.6f} --> {val_loss:.6f}).  Saving model ...",
             )
-        torch.save(model.state_dict(), self.path)
+        start = time.perf_counter()
+        if self.async_save:
+            self.best_state = {
+                key: value.detach().to("cpu", copy=True)
+                for key, value in model.state_dict().items()
+            }
+            self._submit(self.best_state)
+        else:
+            self._write(model.state_dict())
+        if self.report_cost:
+            self.trace_func(
+                f"Checkpoint took {time.perf_counter() - start:.3f}s"
+                + (" (copy to memory)" if self.async_save else ""),
+            )
         self.val_loss_min = val_loss
+
+    def _write(self, state):
+        """Atomically write a state dict to `path`"""
+        tmp_path = f"{self.path}.tmp"
+        torch.save(state, tmp_path)
+        os.replace(tmp_path, self.path)
+
+    def _submit(self, state):
+        """Queue a state for the background writer, replacing any older one"""
+        with self._cond:
+            self._pending = state
+            if self._writer is None:
+                self._closed = False
+                self._writer = threading.Thread(target=self._write_loop, daemon=True)
+                self._writer.start()
+                atexit.register(self.close)
+            self._cond.notify_all()
+
+    def _write_loop(self):
+        """Write the latest queued state to disk whenever there is one"""
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                state, self._pending = self._pending, None
+                self._writing = True
+            try:
+                start = time.perf_counter()
+                self._write(state)
+                if self.report_cost:
+                    self.trace_func(
+                        f"Checkpoint written to {self.path} in {time.perf_counter() - start:.3f}s",
+                    )
+            except Exception as err:
+                self._error = err
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+
+    def flush(self):
+        """Wait until the best state has been written to disk"""
+        with self._cond:
+            while self._pending is not None or self._writing:
+                self._cond.wait()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def close(self):
+        """Write the best state and stop the background writer"""
+        with self._cond:
+            writer, self._writer = self._writer, None
+            self._closed = True
+            self._cond.notify_all()
+        if writer is None:
+            return
+        atexit.unregister(self.close)
+        writer.join()
+        self.flush()
+
+    def __enter__(self):
+        """Use as a context manager that closes on exit"""
+        return self
+
+    def __exit__(self, *args):
+        """Close on exit, writing the last best state"""
+        self.close()
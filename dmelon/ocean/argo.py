@@ -1,12 +1,63 @@
 """
 ARGO module made for some specific usage in downloading
-data from the GDAC center using rsync and screen
+data from the GDAC center, either in-process with `ArgoSync`
+or using rclone and screen, and reading the downloaded profiles
 """
 
 import os
-from typing import Optional
+import re
+import sqlite3
+import threading
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from email.utils import formatdate, parsedate_to_datetime
+from functools import partial
+from typing import TYPE_CHECKING, Callable, NamedTuple, Optional, Sequence
+from urllib.parse import unquote, urljoin
 
+import numpy as np
 import pandas as pd
+import requests
+
+if TYPE_CHECKING:
+    import xarray as xr
+
+GDAC_URL = "https://data-argo.ifremer.fr/"
+ARGO_LOCAL_FTP = "/data/datos/ARGO/gdac"
+
+
+class FloatTask(NamedTuple):
+    """
+    Download task of a single float folder of the GDAC
+    """
+
+    dac: str
+    wmo: str
+    target: str
+
+    @property
+    def combined(self) -> str:
+        """
+        Path of the float folder relative to the `dac` folder
+        """
+        return f"{self.dac}/{self.wmo}"
+
+
+def build_plan(argo_df: pd.DataFrame, ARGO_localFTP: Optional[str] = None) -> list:
+    """
+    Build the list of float folders to download from an ARGO index
+    DataFrame, with the local folder each one is synced to
+    """
+    if ARGO_localFTP is None:
+        ARGO_localFTP = ARGO_LOCAL_FTP
+    dac_floats = argo_df.file.str.extract(r"^(?P<dac>[^/]+)/(?P<wmo>[^/]+)/")
+    dac_floats = dac_floats.drop_duplicates()
+    return [
+        FloatTask(dac, wmo, os.path.join(ARGO_localFTP, "dac", dac, wmo))
+        for dac, wmo in zip(dac_floats.dac, dac_floats.wmo)
+    ]
 
 
 def build_dl(argo_df: pd.DataFrame, ARGO_localFTP: Optional[str] = None):
@@ -14,28 +65,20 @@ def build_dl(argo_df: pd.DataFrame, ARGO_localFTP: Optional[str] = None):
     Build the download command using rsync and screen
     """
     print("\nBuilding download list")
-    dac_floats = pd.DataFrame(
-        argo_df.file.str.split("/").str[:2].str.join("/").unique(),
-        columns=["combined"],
-    )
-    dac_floats["dac"] = dac_floats.combined.str.split("/").str[0]
-    dac_floats["float"] = dac_floats.combined.str.split("/").str[1]
-
-    if ARGO_localFTP is None:
-        ARGO_localFTP = "/data/datos/ARGO/gdac"
+    plan = build_plan(argo_df, ARGO_localFTP)
 
     cmd_template = "screen -dmS auto_{}_{}_{:%Y%m%d_%Hh} rclone sync --http-url https://data-argo.ifremer.fr/ :http:dac/{} {} -P"
 
     today = pd.Timestamp.now(tz="America/Lima")
     dl_list = [
         cmd_template.format(
-            row.dac,
-            row.float,
+            task.dac,
+            task.wmo,
             today,
-            row.combined,
-            os.path.join(ARGO_localFTP, "dac", row.combined),
+            task.combined,
+            task.target,
         )
-        for _, row in dac_floats.iterrows()
+        for task in plan
     ]
     print("Done\n")
     return dl_list
@@ -52,3 +95,680 @@ def launch_shell(cmd_list):
         shfile.write("\n\nwhile screen -list | grep -q auto\ndo\n    sleep 1\ndone")
     os.system("sh launch_shell.sh")
     print("Done\n")
+
+
+class ArgoSync:
+    """
+    In-process mirror of ARGO float folders from the GDAC HTTP server.
+
+    Every float folder is listed and its files are downloaded when they
+    are missing locally or modified on the server, using a pool of at most
+    `max_workers` threads, each one reusing its own HTTP connection.
+    """
+
+    _href = re.compile(r'href="([^"?#]+)"', re.IGNORECASE)
+
+    def __init__(
+        self,
+        local_root: Optional[str] = None,
+        base_url: str = GDAC_URL,
+        max_workers: int = 8,
+        retries: int = 3,
+        backoff: float = 1.0,
+        timeout: float = 60,
+        delete: bool = False,
+        progress: Optional[Callable] = print,
+    ):
+        """
+        Args:
+            local_root (str): Local copy of the GDAC, where the files of
+                            `sync_files` are stored under its `dac` folder.
+                            Default: ARGO_LOCAL_FTP
+            base_url (str): Root url of the GDAC server.
+                            Default: GDAC_URL
+            max_workers (int): Maximum number of concurrent transfers.
+                            Default: 8
+            retries (int): Number of retries of a failed request.
+                            Default: 3
+            backoff (float): Seconds to wait before the first retry, doubled
+                            after every failed attempt.
+                            Default: 1.0
+            timeout (float): Timeout in seconds of each request.
+                            Default: 60
+            delete (bool): Delete local files missing from the server.
+                            Default: False
+            progress (function): Progress report function, None to disable.
+                            Default: print
+        """
+        self.local_root = ARGO_LOCAL_FTP if local_root is None else local_root
+        self.base_url = base_url if base_url.endswith("/") else base_url + "/"
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.delete = delete
+        self.progress = progress
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        """
+        HTTP session of the current thread, kept alive between requests
+        """
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _request(self, url: str, **kwargs):
+        """
+        GET request retried with exponential backoff on connection
+        errors and server errors
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.get(url, timeout=self.timeout, **kwargs)
+            except requests.RequestException as err:
+                error = err
+            else:
+                if response.status_code < 500:
+                    response.raise_for_status()
+                    return response
+                error = requests.HTTPError(
+                    f"{response.status_code} Server Error for url: {url}",
+                    response=response,
+                )
+            if attempt < self.retries:
+                time.sleep(self.backoff * 2**attempt)
+        raise error
+
+    def list_files(self, url: str) -> list:
+        """
+        Recursively list the files of a folder from its HTML index,
+        relative to `url`
+        """
+        response = self._request(url)
+        files = []
+        for href in self._href.findall(response.text):
+            target = urljoin(url, href)
+            # skip parent folders, sort links and external urls
+            if not target.startswith(url) or target == url:
+                continue
+            name = unquote(target[len(url) :])
+            if name.endswith("/"):
+                files.extend(name + sub for sub in self.list_files(target))
+            else:
+                files.append(name)
+        return sorted(set(files))
+
+    def fetch(self, url: str, path: str) -> int:
+        """
+        Download `url` into `path` if it was modified since the local copy.
+        Returns the number of bytes transferred.
+        """
+        headers = {}
+        if os.path.exists(path):
+            headers["If-Modified-Since"] = formatdate(
+                os.path.getmtime(path), usegmt=True
+            )
+        response = self._request(url, headers=headers, stream=True)
+        if response.status_code == 304:
+            response.close()
+            return 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.part"
+        size = 0
+        with open(tmp_path, "wb") as f:
+            for block in response.iter_content(chunk_size=1 << 16):
+                f.write(block)
+                size += len(block)
+        os.replace(tmp_path, path)
+        if "Last-Modified" in response.headers:
+            mtime = parsedate_to_datetime(response.headers["Last-Modified"]).timestamp()
+            os.utime(path, (mtime, mtime))
+        return size
+
+    def sync_float(self, task: FloatTask) -> dict:
+        """
+        Mirror a single float folder into its target
+        """
+        url = urljoin(self.base_url, f"dac/{task.combined}/")
+        local = task.target
+        report = {"downloaded": 0, "skipped": 0, "deleted": 0, "bytes": 0}
+        remote = self.list_files(url)
+        for name in remote:
+            size = self.fetch(url + name, os.path.join(local, name))
+            report["bytes"] += size
+            report["downloaded" if size > 0 else "skipped"] += 1
+        if self.delete and os.path.isdir(local):
+            remote = set(remote)
+            for root, _, names in os.walk(local):
+                for name in names:
+                    path = os.path.join(root, name)
+                    if os.path.relpath(path, local).replace(os.sep, "/") not in remote:
+                        os.remove(path)
+                        report["deleted"] += 1
+        return report
+
+    def sync(self, plan: Sequence[FloatTask]) -> dict:
+        """
+        Mirror the float folders of a plan built with `build_plan`
+        concurrently
+
+        Returns
+        -------
+        dict
+            Totals of files downloaded, skipped and deleted, bytes
+            transferred, elapsed seconds and the failed floats with
+            their error
+        """
+        start = time.perf_counter()
+        summary = {
+            "floats": len(plan),
+            "downloaded": 0,
+            "skipped": 0,
+            "deleted": 0,
+            "bytes": 0,
+            "failed": {},
+        }
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(self.sync_float, task): task.combined for task in plan
+            }
+            for ndone, future in enumerate(as_completed(futures), start=1):
+                combined = futures[future]
+                try:
+                    report = future.result()
+                except Exception as err:
+                    summary["failed"][combined] = repr(err)
+                    status = "failed"
+                else:
+                    for key, value in report.items():
+                        summary[key] += value
+                    status = f"{report['downloaded']} downloaded, {report['skipped']} up to date"
+                if self.progress is not None:
+                    self.progress(f"[{ndone}/{len(plan)}] {combined}: {status}")
+        summary["elapsed"] = time.perf_counter() - start
+        return summary
+
+    def sync_files(self, files: Sequence[str], state=None, dates=None) -> dict:
+        """
+        Download a list of files, given relative to the `dac` folder
+        as in the ARGO index, concurrently
+
+        Parameters
+        ----------
+        files : list of str
+            Files to download, e.g. `aoml/1900001/profiles/R1900001_001.nc`
+        state : ArgoState, optional
+            State database where the downloaded files are recorded
+        dates : list of str, optional
+            `date_update` of each file, recorded in the state database
+
+        Returns
+        -------
+        dict
+            Totals of files downloaded and skipped, bytes transferred,
+            elapsed seconds and the failed files with their error
+        """
+        start = time.perf_counter()
+        summary = {
+            "files": len(files),
+            "downloaded": 0,
+            "skipped": 0,
+            "bytes": 0,
+            "failed": {},
+        }
+        if dates is None:
+            dates = [None] * len(files)
+        step = max(1, len(files) // 20)
+        done = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(
+                    self.fetch,
+                    urljoin(self.base_url, f"dac/{file}"),
+                    os.path.join(self.local_root, "dac", file),
+                ): (file, date)
+                for file, date in zip(files, dates)
+            }
+            for ndone, future in enumerate(as_completed(futures), start=1):
+                file, date = futures[future]
+                try:
+                    size = future.result()
+                except Exception as err:
+                    summary["failed"][file] = repr(err)
+                else:
+                    summary["bytes"] += size
+                    summary["downloaded" if size > 0 else "skipped"] += 1
+                    done.append((file, date))
+                if state is not None and len(done) >= 1000:
+                    state.update(done)
+                    done = []
+                if self.progress is not None and (
+                    ndone % step == 0 or ndone == len(files)
+                ):
+                    self.progress(f"[{ndone}/{len(files)}] files")
+        if state is not None and done:
+            state.update(done)
+        summary["elapsed"] = time.perf_counter() - start
+        return summary
+
+    def sync_incremental(self, argo_df: pd.DataFrame, state) -> dict:
+        """
+        Download only the profile files of an ARGO index DataFrame that are
+        new or whose `date_update` changed since they were recorded in the
+        state database
+        """
+        pending = state.pending(argo_df)
+        if self.progress is not None:
+            self.progress(f"{len(pending)} of {len(argo_df)} files are new or modified")
+        summary = self.sync_files(
+            pending.file.tolist(),
+            state=state,
+            dates=pending.date_update.tolist(),
+        )
+        summary["indexed"] = len(argo_df)
+        return summary
+
+
+class ArgoState:
+    """
+    SQLite database with the `date_update` of every profile file already
+    downloaded, used to sync only the new or modified files of the index
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Path of the SQLite database, created if missing.
+        """
+        self.path = path
+        with self._connect() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS files "
+                "(file TEXT PRIMARY KEY, date_update TEXT)",
+            )
+
+    @contextmanager
+    def _connect(self):
+        """
+        Open a connection to the database, committing and closing it
+        when done
+        """
+        con = sqlite3.connect(self.path)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Return the content of the database as a DataFrame
+        """
+        with self._connect() as con:
+            return pd.read_sql("SELECT file, date_update FROM files", con)
+
+    def pending(self, argo_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Rows of the index whose file is missing from the database or
+        has a different `date_update`
+        """
+        index = pd.DataFrame(
+            {"file": argo_df.file, "date_update": _format_dates(argo_df.date_update)},
+        )
+        known = self.to_dataframe()
+        merged = index.merge(known, on="file", how="left", suffixes=("", "_known"))
+        return index[(merged.date_update != merged.date_update_known).to_numpy()]
+
+    def update(self, records) -> None:
+        """
+        Record a list of (file, date_update) pairs as downloaded
+        """
+        files, dates = zip(*records) if records else ((), ())
+        dates = _format_dates(pd.Series(dates, dtype=object))
+        with self._connect() as con:
+            con.executemany(
+                "INSERT OR REPLACE INTO files (file, date_update) VALUES (?, ?)",
+                [
+                    (file, None if pd.isna(date) else date)
+                    for file, date in zip(files, dates)
+                ],
+            )
+
+
+def _format_dates(dates: pd.Series) -> pd.Series:
+    """
+    Format the `date_update` values the same way whatever their type,
+    pandas only prints the time of datetimes that are not all at midnight
+    """
+    converted = pd.to_datetime(dates, errors="coerce")
+    if dates.notna().sum() and converted.notna().sum() == dates.notna().sum():
+        return converted.dt.strftime("%Y-%m-%dT%H:%M:%S")
+    return dates.where(dates.isna(), dates.astype(str))
+
+
+PROFILE_SIZE_ESTIMATE = 40_000
+# meta, prof, tech and traj files mirrored with the profiles of a float
+FLOAT_FILES_ESTIMATE = 4
+
+
+def _folder_size(path: str) -> tuple:
+    """
+    Number of files and total bytes of a local folder
+    """
+    nfiles = nbytes = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            nfiles += 1
+            nbytes += os.path.getsize(os.path.join(root, name))
+    return nfiles, nbytes
+
+
+def estimate_transfer(
+    argo_df: pd.DataFrame,
+    ARGO_localFTP: Optional[str] = None,
+    state: Optional[ArgoState] = None,
+    sample: int = 1000,
+) -> dict:
+    """
+    Estimate the size of a sync job without transferring anything
+
+    Without a `state` database the job mirrors whole float folders, as
+    `ArgoSync.sync`, so the files and bytes per float come from a sample of
+    the float folders already present in the local copy. If none is, every
+    float counts its profiles of the index, `FLOAT_FILES_ESTIMATE` other
+    files and twice the bytes of its profiles, which the multi-profile
+    file repeats. Floats already mirrored count in full, so the estimate
+    is an upper bound.
+
+    With a `state` database only the pending profile files are transferred,
+    as `ArgoSync.sync_incremental`. Their size is estimated from the mean
+    size of a sample of the profile files already present in the local
+    copy, or `PROFILE_SIZE_ESTIMATE` bytes if none is.
+
+    Returns
+    -------
+    dict
+        Number of floats and files to transfer and the estimated bytes
+    """
+    if ARGO_localFTP is None:
+        ARGO_localFTP = ARGO_LOCAL_FTP
+
+    if state is None:
+        plan = build_plan(argo_df, ARGO_localFTP)
+        folders = [
+            _folder_size(task.target)
+            for task in plan[:: max(1, len(plan) // sample)]
+            if os.path.isdir(task.target)
+        ]
+        if folders:
+            files_per_float, bytes_per_float = np.mean(folders, axis=0)
+        else:
+            profiles = len(argo_df) / max(len(plan), 1)
+            files_per_float = profiles + FLOAT_FILES_ESTIMATE
+            bytes_per_float = 2 * profiles * PROFILE_SIZE_ESTIMATE
+        return {
+            "floats": len(plan),
+            "files": int(round(len(plan) * files_per_float)),
+            "estimated_bytes": int(len(plan) * bytes_per_float),
+        }
+
+    files = state.pending(argo_df)
+    sizes = []
+    for file in argo_df.file.iloc[:: max(1, len(argo_df) // sample)]:
+        path = os.path.join(ARGO_localFTP, "dac", file)
+        if os.path.exists(path):
+            sizes.append(os.path.getsize(path))
+    mean_size = np.mean(sizes) if sizes else PROFILE_SIZE_ESTIMATE
+
+    return {
+        "floats": len(build_plan(files, ARGO_localFTP)),
+        "files": len(files),
+        "estimated_bytes": int(len(files) * mean_size),
+    }
+
+
+STANDARD_LEVELS = np.array(
+    [5, 10, 20, 30, 50, 75, 100, 125, 150, 200, 250, 300, 400, 500, 600, 700, 800, 900]
+    + [1000, 1100, 1200, 1300, 1400, 1500, 1750, 2000],
+    dtype=float,
+)
+
+
+def interp_levels(
+    pres: np.ndarray, values: np.ndarray, levels: np.ndarray
+) -> np.ndarray:
+    """
+    Linearly interpolate a batch of profiles [profile, level] to the
+    given pressure levels, all profiles at once
+
+    Missing values are ignored and levels outside of the sampled pressure
+    range of each profile are set to NaN.
+    """
+    pres = np.asarray(pres, dtype=float)
+    values = np.asarray(values, dtype=float)
+    levels = np.asarray(levels, dtype=float)
+    valid = np.isfinite(pres) & np.isfinite(values)
+    # push the missing samples to the end of every profile
+    order = np.argsort(np.where(valid, pres, np.inf), axis=1, kind="stable")
+    pres = np.take_along_axis(np.where(valid, pres, np.nan), order, axis=1)
+    values = np.take_along_axis(values, order, axis=1)
+    nvalid = valid.sum(axis=1, keepdims=True)
+    last = np.maximum(nvalid - 1, 0)
+
+    # number of samples shallower than each standard level
+    with np.errstate(invalid="ignore"):
+        shallower = (pres[:, :, np.newaxis] < levels).sum(axis=1)
+    lower = np.maximum(shallower - 1, 0)
+    upper = np.minimum(shallower, last)
+
+    p0 = np.take_along_axis(pres, lower, axis=1)
+    p1 = np.take_along_axis(pres, upper, axis=1)
+    v0 = np.take_along_axis(values, lower, axis=1)
+    v1 = np.take_along_axis(values, upper, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weight = np.where(p1 > p0, (levels - p0) / (p1 - p0), 0)
+        inside = (
+            (nvalid > 0)
+            & (levels >= pres[:, :1])
+            & (levels <= np.take_along_axis(pres, last, axis=1))
+        )
+    return np.where(inside, v0 + weight * (v1 - v0), np.nan)
+
+
+def _chars(values: np.ndarray) -> str:
+    """
+    Join a netCDF character array into a stripped string
+    """
+    return b"".join(np.atleast_1d(values)).decode(errors="ignore").strip()
+
+
+def _read_primary_profile(path: str, variables: Sequence[str], adjusted: bool):
+    """
+    Read the pressure, variables and metadata of the primary profile
+    of an ARGO profile file
+    """
+    import xarray as xr
+
+    with xr.open_dataset(path, concat_characters=False) as ds:
+        ds = ds.isel(N_PROF=0)
+        use_adjusted = adjusted and _chars(ds.DATA_MODE.values) in ("A", "D")
+        suffix = "_ADJUSTED" if use_adjusted else ""
+
+        def good(name):
+            """Values of a variable with its bad QC flags masked"""
+            values = ds[name + suffix].values.astype(float)
+            qc_name = f"{name}{suffix}_QC"
+            if qc_name in ds:
+                flags = ds[qc_name].values.astype(str)
+                values = np.where(np.isin(flags, ["1", "2", "5", "8"]), values, np.nan)
+            return values
+
+        pres = good("PRES")
+        profile = {
+            name: good(name) if name in ds else np.full(pres.shape, np.nan)
+            for name in variables
+        }
+        meta = {
+            "time": ds.JULD.values,
+            "latitude": float(ds.LATITUDE),
+            "longitude": float(ds.LONGITUDE),
+            "platform_number": _chars(ds.PLATFORM_NUMBER.values),
+            "cycle_number": int(ds.CYCLE_NUMBER),
+        }
+    return pres, profile, meta
+
+
+def _read_profile_batch(
+    paths: Sequence[str],
+    levels: np.ndarray,
+    variables: Sequence[str],
+    adjusted: bool,
+):
+    """
+    Read a batch of ARGO profile files and interpolate all of them to the
+    standard levels in a single vectorized call per variable
+
+    Files that cannot be read are skipped and returned with their error,
+    to be reported by the parent process.
+    """
+    pres, profiles, metas, failed = [], {name: [] for name in variables}, [], []
+    for path in paths:
+        try:
+            _pres, _profile, _meta = _read_primary_profile(path, variables, adjusted)
+        except Exception as err:
+            failed.append((path, f"{type(err).__name__}: {err}"))
+            continue
+        pres.append(_pres)
+        for name in variables:
+            profiles[name].append(_profile[name])
+        metas.append(_meta)
+
+    # pad the profiles to a common number of levels
+    nlevels = max((p.size for p in pres), default=1)
+
+    def pad(arrays):
+        """Stack the profiles filling the missing levels with NaN"""
+        out = np.full((len(arrays), nlevels), np.nan)
+        for i, array in enumerate(arrays):
+            out[i, : array.size] = array
+        return out
+
+    pres = pad(pres)
+    data = {
+        name: interp_levels(pres, pad(profiles[name]), levels) for name in variables
+    }
+    return data, pd.DataFrame(metas), failed
+
+
+def read_profiles(
+    argo_df: pd.DataFrame,
+    ARGO_localFTP: Optional[str] = None,
+    levels: np.ndarray = STANDARD_LEVELS,
+    variables: Sequence[str] = ("TEMP", "PSAL"),
+    adjusted: bool = True,
+    max_workers: Optional[int] = None,
+    batch_size: int = 200,
+    store: Optional[str] = None,
+    chunksize: int = 10_000,
+) -> "xr.Dataset":
+    """
+    Load the profiles of an ARGO index DataFrame from the local copy of
+    the GDAC into a single dataset on standard pressure levels
+
+    The files are read in batches by a pool of worker processes, only
+    the primary profile of each file is kept and the adjusted values are
+    used for profiles in delayed or adjusted mode. Values with bad QC
+    flags are discarded before the interpolation. Missing files and files
+    that cannot be read are skipped with a warning.
+
+    Parameters
+    ----------
+    argo_df : pandas.DataFrame
+        ARGO index, e.g. the output of `dmelon.utils.findPointsInPolys`
+    ARGO_localFTP : str, optional
+        Local copy of the GDAC
+    levels : array_like
+        Standard pressure levels in dbar
+    variables : list of str
+        Variables to load
+    adjusted : bool
+        Use the adjusted values when available
+    max_workers : int, optional
+        Number of worker processes
+    batch_size : int
+        Number of files read by each task
+    store : str, optional
+        Write the dataset to this zarr store
+    chunksize : int
+        Number of profiles per chunk of the zarr store
+
+    Returns
+    -------
+    xarray.Dataset
+        Variables with dimensions [profile, pressure]
+    """
+    import xarray as xr
+
+    if ARGO_localFTP is None:
+        ARGO_localFTP = ARGO_LOCAL_FTP
+    levels = np.asarray(levels, dtype=float)
+    files = pd.Series(argo_df.file.to_numpy())
+    paths = ARGO_localFTP + os.sep + "dac" + os.sep + files
+    exists = paths.map(os.path.exists).to_numpy(dtype=bool)
+    if not exists.all():
+        warnings.warn(
+            f"{(~exists).sum()} profile files are missing from {ARGO_localFTP}"
+        )
+    files, paths = files[exists].tolist(), paths[exists].tolist()
+
+    batches = [paths[i : i + batch_size] for i in range(0, len(paths), batch_size)]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        results = list(
+            pool.map(
+                partial(
+                    _read_profile_batch,
+                    levels=levels,
+                    variables=variables,
+                    adjusted=adjusted,
+                ),
+                batches,
+            ),
+        )
+    failed = dict(pair for result in results for pair in result[2])
+    for path, error in failed.items():
+        warnings.warn(f"Skipping unreadable profile file {path}: {error}")
+    files = [file for file, path in zip(files, paths) if path not in failed]
+
+    data = {
+        name: np.concatenate(
+            [result[0][name] for result in results] or [np.empty((0, levels.size))],
+        )
+        for name in variables
+    }
+    meta = pd.concat(
+        [result[1] for result in results] or [pd.DataFrame()], ignore_index=True
+    )
+    ds = xr.Dataset(
+        {name: (["profile", "pressure"], values) for name, values in data.items()},
+        coords={
+            "pressure": levels,
+            "file": ("profile", np.array(files, dtype=str)),
+            **{
+                name: ("profile", meta[name].to_numpy(dtype=dtype))
+                for name, dtype in [
+                    ("time", "datetime64[ns]"),
+                    ("latitude", float),
+                    ("longitude", float),
+                    ("platform_number", str),
+                    ("cycle_number", int),
+                ]
+                if name in meta
+            },
+        },
+    )
+    if store is not None:
+        ds.chunk({"profile": chunksize}).to_zarr(store, mode="w", consolidated=True)
+    return ds
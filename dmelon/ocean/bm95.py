@@ -4,6 +4,8 @@ Python implementation of the Boulanger & Menkes 1995 paper
 
 import numpy as np
 import xarray as xr
+from scipy.integrate import trapezoid
+from scipy.linalg import lu_factor, lu_solve
 from scipy.special import eval_hermite, factorial
 
 
@@ -74,7 +76,7 @@ def hermite_function(n, x):
     return eval_hermite(n, x) / coef
 
 
-def meridional_structures(n, lats):
+def meridional_structures(n, lats, c=2.5):
     """
     Compute the meridional structures using the formulas in BM95
 
@@ -85,27 +87,39 @@ def meridional_structures(n, lats):
         order of the underlying Hermite Functions
     lats : array_like
         Array of latitudes
+    c : float or array_like
+        Gravity wave phase speed. If an array is given, the structures of
+        every phase speed are built together along a ``baroclinic_mode``
+        dimension
     """
-    sclats = scale_lats(lats)
-    R = np.empty((2, n) + sclats.shape)
-    R_0 = np.sqrt(1 / 2) * hermite_function(0, sclats)
-    R[:, 0, :] = np.vstack((R_0, R_0))
+    speeds = np.atleast_1d(c)
+    lats = np.asarray(lats)
+    sclats = scale_lats(lats[np.newaxis, :], speeds[:, np.newaxis])
+    x = sclats[:, np.newaxis, :]
+    R = np.empty((2, speeds.size, n) + lats.shape)
+    R[:, :, :1, :] = np.sqrt(1 / 2) * hermite_function(0, x)
     order = np.atleast_2d(np.arange(1, n)).T
-    hforward = hermite_function(order + 1, sclats) / (np.sqrt(order + 1))
-    hbackward = hermite_function(order - 1, sclats) / np.sqrt(order)
+    hforward = hermite_function(order + 1, x) / (np.sqrt(order + 1))
+    hbackward = hermite_function(order - 1, x) / np.sqrt(order)
     coef = np.sqrt((order * (order + 1)) / (2 * (2 * order + 1)))
-    R[:, 1:, :] = np.stack((hforward - hbackward, hforward + hbackward)) * coef
+    R[:, :, 1:, :] = np.stack((hforward - hbackward, hforward + hbackward)) * coef
+
+    dims = ["hpoly", "lat"]
+    coords = {"hpoly": np.arange(n), "lat": lats}
+    if np.ndim(c) == 0:
+        R, sclats = R[:, 0], sclats[0]
+    else:
+        dims = ["baroclinic_mode"] + dims
+        coords["baroclinic_mode"] = np.arange(1, speeds.size + 1)
+        coords["c"] = ("baroclinic_mode", speeds)
+    coords["scaled_lat"] = (dims[:-2] + ["lat"], sclats)
 
     R = xr.Dataset(
         {
-            "R_u": (["hpoly", "lat"], R[0, :, :]),
-            "R_h": (["hpoly", "lat"], R[1, :, :]),
-        },
-        coords={
-            "hpoly": np.arange(n),
-            "lat": lats.data,
-            "scaled_lat": (["lat"], sclats.data),
+            "R_u": (dims, R[0]),
+            "R_h": (dims, R[1]),
         },
+        coords=coords,
     )
 
     return R
@@ -119,7 +133,7 @@ class Projection:
     It constructs the meridional structures when instantiated.
     """
 
-    def __init__(self, sea_level, nmodes):
+    def __init__(self, sea_level, nmodes, c=2.5, group_masks=False):
         """
         Parameters
         ----------
@@ -128,10 +142,23 @@ class Projection:
             compute the meridional decomposition.
         nmods : int
             Number of meridional modes to consider
+        c : float or array_like
+            Gravity wave phase speed. If an array is given, the sea level
+            is projected on every baroclinic mode in a single pass and the
+            results gain a ``baroclinic_mode`` dimension
+        group_masks : bool
+            If True, the A matrix is rebuilt over the valid latitudes of
+            each (time, lon) column, so that columns crossing land are not
+            biased. Columns are grouped by their pattern of missing
+            latitudes and each group is solved with a single cached
+            factorization. The sea level is loaded into memory
         """
         self.sea_level = sea_level
-        self.R = meridional_structures(nmodes, self.sea_level.lat)
-        self.A = self._build_A(self.R.R_h.data)
+        self.c = c
+        self.group_masks = group_masks
+        self._factors = {}
+        self.R = meridional_structures(nmodes, self.sea_level.lat, c=c)
+        self.A = self._build_A(self.R.R_h.data, c=c)
         self.A_inv = self._minv(self.A)
         self.b = self._compute_projection_vector()
         self.r = self._compute_wave_coefficient_vector()
@@ -146,48 +173,65 @@ class Projection:
             np.linalg.inv,
             xrobj,
             dask="parallelized",
-            output_dtypes=[np.float],
+            output_dtypes=[float],
         )
 
     @staticmethod
-    def _build_A(Rh):
+    def _build_A(Rh, c=2.5):
         """
         Build the A matrix of the sea level decomposition method
         """
-        Rh = Rh[..., np.newaxis]
-        A = np.trapz(Rh * Rh.T, dx=scale_lats(0.25), axis=1)
+        dx = np.reshape(scale_lats(0.25, np.asarray(c)), np.shape(c) + (1, 1))
+        A = (
+            trapezoid(Rh[..., :, np.newaxis, :] * Rh[..., np.newaxis, :, :], axis=-1)
+            * dx
+        )
 
+        dims = ["baroclinic_mode"] if np.ndim(c) else []
         A = xr.DataArray(
             A,
-            coords=[
-                ("hpoly", np.arange(A.shape[0])),
-                ("_hpoly", np.arange(A.shape[0])),
-            ],
+            dims=dims + ["hpoly", "_hpoly"],
+            coords={
+                "hpoly": np.arange(A.shape[-1]),
+                "_hpoly": np.arange(A.shape[-1]),
+            },
         )
         return A
 
     @staticmethod
-    def _integrate(xrobj, dim):
+    def _integrate(xrobj, dim, dx=None):
         """
         Trapezoidal integration with xarray data structures
         """
-        return xr.apply_ufunc(
+        if dx is None:
+            dx = scale_lats(0.25)
+        return dx * xr.apply_ufunc(
             _nantrapz,
             xrobj,
             input_core_dims=[[dim]],
-            kwargs={"axis": -1, "dx": scale_lats(0.25)},
+            kwargs={"axis": -1},
             dask="parallelized",
-            output_dtypes=[np.float],
+            output_dtypes=[float],
         )
 
+    def _speed_factor(self, values):
+        """
+        Wrap a function of the phase speed to broadcast against the structures
+        """
+        if np.ndim(self.c) == 0:
+            return values
+        return xr.DataArray(values, dims=["baroclinic_mode"])
+
     def _compute_projection_vector(self):
         """
         Build the projection vector `b`
         """
+        c = np.asarray(self.c)
         b = self._integrate(
-            (self.sea_level.interpolate_na(dim="lon", limit=2) / ((2.5**2) / 9.81))
-            * self.R.R_h,
+            self.sea_level.interpolate_na(dim="lon", limit=2)
+            * (self.R.R_h / self._speed_factor((c**2) / 9.81)),
             dim="lat",
+            dx=self._speed_factor(scale_lats(0.25, c)),
         )
         b.name = "projection_vector"
         return b
@@ -196,10 +240,58 @@ class Projection:
         """
         Build the wave coefficient vector `r`
         """
-        r = xr.dot(self.A_inv, self.b).rename({"_hpoly": "hpoly"})
+        if self.group_masks:
+            r = self._solve_by_mask()
+        else:
+            r = xr.dot(self.A_inv, self.b, dim="hpoly").rename({"_hpoly": "hpoly"})
         r.name = "wave_coefficient_vector"
         return r
 
+    def _factorize(self, pattern):
+        """
+        LU factorizations of A restricted to the valid latitudes of a mask
+        pattern, one per phase speed, or None if A would be singular
+        """
+        key = pattern.tobytes()
+        if key not in self._factors:
+            Rh = self.R.R_h.data.reshape((-1,) + self.R.R_h.shape[-2:])
+            nmodes = Rh.shape[1]
+            if (~pattern).sum() <= nmodes:
+                self._factors[key] = None
+            else:
+                dx = np.atleast_1d(scale_lats(0.25, np.asarray(self.c)))
+                y = Rh[:, :, np.newaxis, :] * Rh[:, np.newaxis, :, :]
+                y[..., pattern] = np.nan
+                A = _nantrapz(y, axis=-1) * dx[:, np.newaxis, np.newaxis]
+                self._factors[key] = [lu_factor(matrix) for matrix in A]
+        return self._factors[key]
+
+    def _solve_by_mask(self):
+        """
+        Solve the wave coefficients grouping the (time, lon) columns by
+        their pattern of missing latitudes
+        """
+        mode_dims = ["baroclinic_mode"] if np.ndim(self.c) else []
+        sla = self.sea_level.interpolate_na(dim="lon", limit=2)
+        mask = np.isnan(sla.transpose("time", "lon", "lat").values)
+        mask = mask.reshape(-1, mask.shape[-1])
+        b = self.b.transpose(*mode_dims, "time", "lon", "hpoly")
+        rhs = b.values.reshape((-1,) + mask.shape[:1] + b.shape[-1:])
+
+        patterns, inverse = np.unique(mask, axis=0, return_inverse=True)
+        order = np.argsort(inverse.ravel(), kind="stable")
+        groups = np.split(order, np.cumsum(np.bincount(inverse.ravel()))[:-1])
+        r = np.full(rhs.shape, np.nan)
+        for pattern, columns in zip(patterns, groups):
+            factors = self._factorize(pattern)
+            if factors is None:
+                continue
+            for mode, factor in enumerate(factors):
+                r[mode, columns] = lu_solve(factor, rhs[mode, columns].T).T
+
+        r = xr.DataArray(r.reshape(b.shape), coords=b.coords, dims=b.dims)
+        return r.transpose(*mode_dims, "hpoly", "time", "lon")
+
     @property
     def projection_vector(self):
         """
@@ -229,11 +321,12 @@ class Projection:
         Decompose the sea level
         """
         if self.h is None:
-            self.h = (self.r * self.R.R_h).drop(["scaled_lat"]).transpose(
+            self.h = (self.r * self.R.R_h).drop_vars(["scaled_lat"]).transpose(
+                ...,
                 "hpoly",
                 "time",
                 "lat",
                 "lon",
-            ) * ((2.5**2) / 9.81)
+            ) * self._speed_factor((np.asarray(self.c) ** 2) / 9.81)
             self.h.name = "wave_amp"
         return self.h
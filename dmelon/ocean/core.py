@@ -2,8 +2,58 @@
 General functions used specifically in ocean data analysis
 """
 
+from functools import lru_cache
+
 import numpy as np
 
+BETA = 2.29e-11
+C = 2.7
+G = 9.81
+METERS_PER_DEGREE = 110e3
+SECONDS_PER_DAY = 60 * 60 * 24
+
+
+@lru_cache(maxsize=32)
+def _matsuno(wavenumber, modes, equivalent_depth, beta):
+    """
+    Memoized equatorial wave frequencies for hashable (tuple) arguments
+    """
+    import xarray as xr
+
+    wavenumber = np.asarray(wavenumber, dtype=float)
+    n = np.asarray(modes, dtype=float)[:, np.newaxis, np.newaxis]
+    depth = np.asarray(equivalent_depth, dtype=float)
+    c = np.sqrt(G * depth)[:, np.newaxis]
+    # wavenumber in rad/m scaled by the equatorial deformation radius
+    k = 2 * np.pi * wavenumber / METERS_PER_DEGREE / np.sqrt(beta / c)
+    to_cpd = np.sqrt(beta * c) * SECONDS_PER_DAY / (2 * np.pi)
+
+    kelvin = np.where(k >= 0, k, np.nan)
+    mrg = k / 2 + np.sqrt(k**2 / 4 + 1)
+    # w**3 - (k**2 + 2n + 1) w - k = 0 has three real roots for n >= 1
+    a = k**2 + 2 * n + 1
+    theta = np.arccos(np.clip(1.5 * k / a * np.sqrt(3 / a), -1, 1)) / 3
+    amplitude = 2 * np.sqrt(a / 3)
+    gravity = amplitude * np.cos(theta)
+    rossby = amplitude * np.cos(theta - 2 * np.pi / 3)
+    rossby = np.where(rossby > 0, rossby, np.nan)
+
+    dims = ["equivalent_depth", "wavenumber"]
+    return xr.Dataset(
+        {
+            "kelvin": (dims, kelvin * to_cpd),
+            "mrg": (dims, mrg * to_cpd),
+            "inertia_gravity": (["mode"] + dims, gravity * to_cpd),
+            "rossby": (["mode"] + dims, rossby * to_cpd),
+        },
+        coords={
+            "mode": np.asarray(modes),
+            "equivalent_depth": depth,
+            "c": ("equivalent_depth", c[:, 0]),
+            "wavenumber": wavenumber,
+        },
+    )
+
 
 class DispersionRelation:
     """
@@ -15,10 +65,57 @@ class DispersionRelation:
         """
         Compute the scaled wavenumber and frequency for the mode m
         """
-        BETA = 2.29e-11
-        C = 2.7
         CONST1 = (BETA * C) ** (1 / 2)
         CONST2 = (BETA / C) ** (1 / 2)
         k = np.arange(-10, 10, 0.1)
         w = -k / (2 * m + 1 + k**2)
         return w * CONST1 * 60 * 60 * 24 / (2 * np.pi), k * CONST2 * 110e3 / (2 * np.pi)
+
+    @staticmethod
+    def curves(wavenumber=None, modes=(1, 2, 3), equivalent_depth=None, beta=BETA):
+        """
+        Compute the Matsuno (1966) shallow water equatorial wave dispersion
+        curves for every mode, equivalent depth and wavenumber at once
+
+        Frequencies are positive, westward propagation has negative
+        wavenumbers, and branches that do not exist are NaN. Results are
+        memoized, so repeated overlays on different spectra are free.
+
+        Parameters
+        ----------
+        wavenumber : array_like, optional
+            Zonal wavenumbers in cycles per degree, as the ``wavenumber``
+            axis of :func:`dmelon.spectral.power.compute_power`. Defaults to
+            201 values between -0.5 and 0.5
+        modes : array_like of int
+            Meridional modes of the inertia-gravity and Rossby waves
+        equivalent_depth : array_like, optional
+            Equivalent depths in m. Defaults to the one of the first
+            baroclinic mode used by :meth:`low_freq`
+        beta : float
+            Meridional gradient of the Coriolis parameter in 1/(m s)
+
+        Returns
+        -------
+        xr.Dataset
+            Frequencies in cycles per day of the ``kelvin`` and ``mrg``
+            (mixed Rossby-gravity) waves over ``equivalent_depth`` and
+            ``wavenumber``, and of the ``inertia_gravity`` and ``rossby``
+            waves with an extra ``mode`` dimension
+        """
+        if wavenumber is None:
+            wavenumber = np.linspace(-0.5, 0.5, 201)
+        if equivalent_depth is None:
+            equivalent_depth = C**2 / G
+
+        def _key(values, dtype):
+            """Hashable tuple of the values, for the memoized computation"""
+            return tuple(np.atleast_1d(np.asarray(values, dtype=dtype)).tolist())
+
+        curves = _matsuno(
+            _key(wavenumber, float),
+            _key(modes, int),
+            _key(equivalent_depth, float),
+            float(beta),
+        )
+        return curves.copy(deep=True)
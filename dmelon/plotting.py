@@ -1,29 +1,42 @@
 """
 Plotting module that contains most boilerplate code
-I use for my plots
+I use for my plots, and a parallel renderer for batches of maps
 """
 
-import cartopy.feature as cfeature
+import os
+from contextlib import ExitStack
+from functools import lru_cache
+
 import numpy as np
-from cartopy.mpl.ticker import LatitudeFormatter, LongitudeFormatter
-
-SD_BORDER = cfeature.NaturalEarthFeature(
-    category="cultural",
-    name="admin_0_countries",
-    scale="50m",
-    facecolor="white",
-    edgecolor="black",
-    linewidth=1,
-)
-
-HQ_BORDER = cfeature.NaturalEarthFeature(
-    category="cultural",
-    name="admin_0_countries",
-    scale="10m",
-    facecolor="white",
-    edgecolor="black",
-    linewidth=1,
-)
+
+# module level borders, built on first access, see __getattr__
+_BORDERS = {"SD_BORDER": "50m", "HQ_BORDER": "10m"}
+
+
+@lru_cache(maxsize=None)
+def country_borders(scale="50m"):
+    """
+    Natural Earth country borders at the given scale, built once
+    """
+    import cartopy.feature as cfeature
+
+    return cfeature.NaturalEarthFeature(
+        category="cultural",
+        name="admin_0_countries",
+        scale=scale,
+        facecolor="white",
+        edgecolor="black",
+        linewidth=1,
+    )
+
+
+def __getattr__(name):
+    """
+    Build SD_BORDER and HQ_BORDER when first accessed
+    """
+    if name in _BORDERS:
+        return country_borders(_BORDERS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def format_latlon(
@@ -37,6 +50,8 @@ def format_latlon(
     """
     Format geoaxes nicely
     """
+    from cartopy.mpl.ticker import LatitudeFormatter, LongitudeFormatter
+
     (ilon, flon, ilat, flat) = latlon_bnds
 
     lon_formatter = LongitudeFormatter(number_format=nformat)
@@ -48,3 +63,176 @@ def format_latlon(
     ax.xaxis.set_major_formatter(lon_formatter)
     ax.yaxis.set_major_formatter(lat_formatter)
     return ax
+
+
+@lru_cache(maxsize=None)
+def projected_borders(proj, extent, borders="10m"):
+    """
+    Geometries of a border feature that intersect the lon/lat `extent`,
+    projected once to `proj` and cached for later maps
+
+    Parameters
+    ----------
+    proj : cartopy.crs.Projection
+        Projection of the maps
+    extent : tuple
+        (lon_min, lon_max, lat_min, lat_max) of the maps
+    borders : str or cartopy.feature.Feature
+        Natural Earth scale of the country borders or any other feature
+    """
+    import cartopy.crs as ccrs
+
+    feature = country_borders(borders) if isinstance(borders, str) else borders
+    geoms = []
+    for geom in feature.intersecting_geometries(extent):
+        projected = proj.project_geometry(geom, feature.crs or ccrs.PlateCarree())
+        if not projected.is_empty:
+            geoms.append(projected)
+    return tuple(geoms)
+
+
+# projected borders of the worker processes of `render_maps`
+_WORKER_BORDERS = ()
+
+
+def _init_worker(geoms):
+    """
+    Keep the projected borders in the worker process
+    """
+    global _WORKER_BORDERS
+    import matplotlib
+
+    matplotlib.use("Agg")
+    _WORKER_BORDERS = geoms
+
+
+def _render_frame(path, frame, plot_func, proj, extent, figsize, dpi, latlon_kwargs):
+    """
+    Render a single map to a file
+    """
+    import cartopy.crs as ccrs
+    import cartopy.feature as cfeature
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=figsize)
+    ax = fig.add_subplot(projection=proj)
+    ax.set_extent(extent, crs=ccrs.PlateCarree())
+    plot_func(ax, frame)
+    if _WORKER_BORDERS:
+        ax.add_feature(
+            cfeature.ShapelyFeature(
+                _WORKER_BORDERS,
+                proj,
+                facecolor="white",
+                edgecolor="black",
+                linewidth=1,
+            ),
+        )
+    format_latlon(ax, ccrs.PlateCarree(), latlon_bnds=extent, **latlon_kwargs)
+    fig.savefig(path, dpi=dpi, bbox_inches="tight")
+    plt.close(fig)
+    return path
+
+
+def render_maps(
+    frames,
+    plot_func,
+    output_dir,
+    extent=(-180, 180, -90, 90),
+    proj=None,
+    borders="10m",
+    figsize=(8, 5),
+    dpi=100,
+    max_workers=None,
+    filename="frame_{:04d}.png",
+    animation=None,
+    fps=10,
+    **latlon_kwargs,
+):
+    """
+    Render a batch of maps in parallel with a common layout
+
+    The border geometries are read and projected once, in the main process,
+    and shared with a pool of worker processes that render one frame each.
+
+    Parameters
+    ----------
+    frames : sequence
+        Data of each map, passed to `plot_func`
+    plot_func : callable
+        Function called as ``plot_func(ax, frame)`` to draw a frame on its
+        GeoAxes. It must be picklable, e.g. defined at module level.
+    output_dir : str
+        Folder where the PNG files are written
+    extent : tuple
+        (lon_min, lon_max, lat_min, lat_max) of the maps
+    proj : cartopy.crs.Projection, optional
+        Projection of the maps, PlateCarree centered at 180 by default
+    borders : str, cartopy.feature.Feature or None
+        Natural Earth scale of the country borders, any other feature or
+        None to skip them
+    max_workers : int, optional
+        Number of worker processes
+    filename : str
+        Format of the file names, filled with the frame number
+    animation : str, optional
+        Also assemble the frames into this GIF file, unless there are none
+    fps : int
+        Frames per second of the animation
+    **latlon_kwargs
+        Passed down to `format_latlon`
+
+    Returns
+    -------
+    list of str
+        Paths of the rendered frames
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from functools import partial
+
+    import cartopy.crs as ccrs
+
+    if len(frames) == 0:
+        return []
+    if proj is None:
+        proj = ccrs.PlateCarree(central_longitude=180)
+    extent = tuple(extent)
+    geoms = () if borders is None else projected_borders(proj, extent, borders)
+
+    os.makedirs(output_dir, exist_ok=True)
+    paths = [os.path.join(output_dir, filename.format(i)) for i in range(len(frames))]
+    render = partial(
+        _render_frame,
+        plot_func=plot_func,
+        proj=proj,
+        extent=extent,
+        figsize=figsize,
+        dpi=dpi,
+        latlon_kwargs=latlon_kwargs,
+    )
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(geoms,),
+    ) as pool:
+        paths = list(
+            pool.map(render, paths, frames, chunksize=max(1, len(frames) // 64))
+        )
+
+    if animation is not None:
+        from PIL import Image
+
+        # close the files and decoded frames once the animation is written
+        with ExitStack() as stack:
+            images = []
+            for path in paths:
+                images.append(Image.open(path))
+                stack.callback(images[-1].close)
+            images[0].save(
+                animation,
+                save_all=True,
+                append_images=images[1:],
+                duration=int(1000 / fps),
+                loop=0,
+            )
+    return paths
@@ -2,6 +2,10 @@
 Module containing spectral methods
 """
 
-from . import filters, power, wavelet
+from .._lazy import lazy_submodules
 
+# submodules are imported on first access, see dmelon._lazy
 __all__ = ["filters", "power", "wavelet"]
+
+
+__getattr__, __dir__ = lazy_submodules(globals())
@@ -62,7 +62,7 @@ def lanczosfilter(X, Cf, dT=1, M=100, kind="low", *args):
     Core function that filters the signal in either low or high pass
     """
     if np.isnan(X).all():
-        return np.full_like(X, np.nan, dtype=np.float)
+        return np.full_like(X, np.nan, dtype=float)
     kind_val = {"high": 1, "low": 0}
     Nf = 1 / (2 * dT)
     Cf = Cf / Nf
@@ -6,7 +6,8 @@ import numpy as np
 import numpy.fft as fft
 import xarray as xr
 from scipy.ndimage import convolve1d
-from scipy.signal import stft
+from scipy.signal import get_window, stft, welch
+from scipy.signal.windows import dpss
 
 from .. import statistics
 
@@ -83,3 +84,172 @@ def compute_power(xdata, Nx, Nt, xres, tres, window, noverlap, psmooth=True):
         smooth_power = convolve1d(smooth_power, kernel.data)
     smooth_power = xr.DataArray(smooth_power, coords=power.coords)
     return power, smooth_power
+
+
+def _confidence(power, dof, siglvl):
+    """
+    Chi-square confidence limits of a spectral estimate with dof degrees of freedom
+    """
+    from scipy.stats import chi2
+
+    lower = dof / chi2.ppf((1 + siglvl) / 2, dof)
+    upper = dof / chi2.ppf((1 - siglvl) / 2, dof)
+    return power * lower, power * upper
+
+
+def _spectrum_dataset(power, lower, upper, dof, freq, method):
+    """
+    Wrap a spectral estimate and its confidence limits in a Dataset
+    """
+    ds = xr.Dataset({"power": power, "lower": lower, "upper": upper})
+    ds = ds.assign_coords(frequency=freq)
+    ds.attrs.update(edof=dof, method=method)
+    return ds
+
+
+def _welch(x, fs, window, nperseg, noverlap, detrend):
+    """
+    Welch spectra of the series along the last axis
+    """
+    return welch(
+        x,
+        fs=fs,
+        window=window,
+        nperseg=nperseg,
+        noverlap=noverlap,
+        detrend=detrend,
+        axis=-1,
+    )[1]
+
+
+def welch_spectrum(
+    da,
+    dim="time",
+    dt=1,
+    nperseg=256,
+    noverlap=None,
+    window="hann",
+    detrend="constant",
+    siglvl=0.95,
+):
+    """
+    Welch frequency spectrum at every grid point with confidence limits
+
+    The segments of all the series of a chunk go through a single batched
+    FFT, and dask chunks over the other dimensions are processed
+    independently, so only the time axis needs to fit in a chunk.
+
+    Parameters
+    ----------
+    da : xarray.DataArray
+        Field with a ``dim`` dimension, e.g. [time, lat, lon]
+    dim : str
+        Dimension along which the spectra are computed
+    dt : float
+        Sampling interval, frequencies are in cycles per unit of ``dt``
+    nperseg : int
+        Length of each segment
+    noverlap : int, optional
+        Number of points shared by consecutive segments, half a segment
+        by default
+    window : str or array_like
+        Window applied to each segment, see :func:`scipy.signal.get_window`
+    detrend : str or False
+        Detrending applied to each segment
+    siglvl : float
+        Confidence level of the limits
+
+    Returns
+    -------
+    xarray.Dataset
+        One-sided power spectral density ``power`` with its ``lower`` and
+        ``upper`` confidence limits, using the degrees of freedom of
+        :func:`dmelon.statistics.edof` stored in the ``edof`` attribute
+    """
+    N = da.sizes[dim]
+    nperseg = min(nperseg, N)
+    if noverlap is None:
+        noverlap = nperseg // 2
+    win = get_window(window, nperseg) if isinstance(window, (str, tuple)) else window
+    freq = np.fft.rfftfreq(nperseg, dt)
+    power = xr.apply_ufunc(
+        _welch,
+        statistics._single_chunk(da, dim),
+        kwargs={
+            "fs": 1 / dt,
+            "window": win,
+            "nperseg": nperseg,
+            "noverlap": noverlap,
+            "detrend": detrend,
+        },
+        input_core_dims=[[dim]],
+        output_core_dims=[["frequency"]],
+        dask="parallelized",
+        output_dtypes=[float],
+        dask_gufunc_kwargs={"output_sizes": {"frequency": freq.size}},
+    )
+    dof = float(statistics.edof(N, win, noverlap))
+    return _spectrum_dataset(
+        power, *_confidence(power, dof, siglvl), dof, freq, "welch"
+    )
+
+
+def _multitaper(x, tapers, dt):
+    """
+    Multitaper spectra of the series along the last axis
+    """
+    x = x - x.mean(axis=-1, keepdims=True)
+    N = x.shape[-1]
+    eigen = np.abs(np.fft.rfft(x[..., np.newaxis, :] * tapers, axis=-1)) ** 2
+    power = eigen.mean(axis=-2) * dt
+    # one-sided density, the zero and Nyquist frequencies are not doubled
+    power[..., 1 : (N + 1) // 2] *= 2
+    return power
+
+
+def multitaper_spectrum(da, dim="time", dt=1, NW=4, K=None, siglvl=0.95):
+    """
+    DPSS multitaper frequency spectrum at every grid point with confidence
+    limits
+
+    Parameters
+    ----------
+    da : xarray.DataArray
+        Field with a ``dim`` dimension, e.g. [time, lat, lon]
+    dim : str
+        Dimension along which the spectra are computed
+    dt : float
+        Sampling interval, frequencies are in cycles per unit of ``dt``
+    NW : float
+        Time half-bandwidth product of the tapers
+    K : int, optional
+        Number of tapers, ``2 NW - 1`` by default
+    siglvl : float
+        Confidence level of the limits
+
+    Returns
+    -------
+    xarray.Dataset
+        One-sided power spectral density ``power`` with its ``lower`` and
+        ``upper`` confidence limits, using ``2 K`` degrees of freedom stored
+        in the ``edof`` attribute
+    """
+    N = da.sizes[dim]
+    if K is None:
+        K = int(2 * NW - 1)
+    tapers = dpss(N, NW, K)
+    freq = np.fft.rfftfreq(N, dt)
+    power = xr.apply_ufunc(
+        _multitaper,
+        statistics._single_chunk(da, dim),
+        kwargs={"tapers": tapers, "dt": dt},
+        input_core_dims=[[dim]],
+        output_core_dims=[["frequency"]],
+        dask="parallelized",
+        output_dtypes=[float],
+        dask_gufunc_kwargs={"output_sizes": {"frequency": freq.size}},
+    )
+    dof = 2.0 * K
+    return _spectrum_dataset(
+        power, *_confidence(power, dof, siglvl), dof, freq, "multitaper"
+    )
@@ -3,6 +3,14 @@ Submodule containing wavelet methods
 """
 
 from .core import wavelet
+from .gridded import global_wavelet_spectrum, scale_averaged_power
+from .online import WaveletMonitor
 from .wt import wt
 
-__all__ = ["wavelet", "wt"]
+__all__ = [
+    "WaveletMonitor",
+    "global_wavelet_spectrum",
+    "scale_averaged_power",
+    "wavelet",
+    "wt",
+]
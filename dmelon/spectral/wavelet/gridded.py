@@ -0,0 +1,286 @@
+"""
+Wavelet spectra of gridded fields, computed for every grid point at once
+"""
+
+from functools import lru_cache
+from typing import Optional, Sequence
+
+import numpy as np
+import xarray as xr
+
+from ... import statistics
+from .core import _signif_constants, wave_signif, wavelet
+
+# bound on the size of the complex coefficients held at once by a kernel
+MAX_BLOCK_BYTES = 256e6
+
+
+def _scales(n, dt, dj, s0, J1, mother, param):
+    """
+    Scales and Fourier periods used by :func:`wavelet` for a record of length n
+    """
+    if s0 is None:
+        s0 = 2 * dt
+    if J1 is None:
+        J1 = np.fix((np.log(n * dt / s0) / np.log(2)) / dj)
+    scale = s0 * 2.0 ** (np.arange(0, J1 + 1) * dj)
+    return scale, scale * _signif_constants(mother, param)[1]
+
+
+@lru_cache(maxsize=64)
+def _signif_factor(sigtest, dt, scale, siglvl, dof, mother, param):
+    """
+    Significance of :func:`wave_signif` for a unit variance white noise
+
+    It only depends on the parameters, so it is computed once and scaled by
+    the red noise spectrum of every grid point.
+    """
+    return wave_signif(
+        1.0,
+        dt,
+        np.array(scale),
+        sigtest=sigtest,
+        lag1=0.0,
+        siglvl=siglvl,
+        dof=np.array(dof),
+        mother=mother,
+        param=param,
+    )
+
+
+def _red_noise(lag1, variance, period, dt):
+    """
+    Theoretical red noise spectrum [Eqn(16)] with one lag1 per series
+    """
+    lag1 = lag1[..., np.newaxis]
+    cos = np.cos(2 * np.pi * dt / period)
+    return variance[..., np.newaxis] * (1 - lag1**2) / (1 - 2 * lag1 * cos + lag1**2)
+
+
+def _series_stats(x, lag1):
+    """
+    Variance and lag-1 autocorrelation of each series along the last axis
+    """
+    variance = np.var(x, axis=-1, ddof=1)
+    if isinstance(lag1, str):
+        lag1, _ = statistics._ar1(x)
+    return variance, np.broadcast_to(lag1, variance.shape)
+
+
+def _power(x, dt, dj, pad, mother, param, period):
+    """
+    Wavelet power of the series along the last axis at the given periods,
+    computed in blocks that hold at most MAX_BLOCK_BYTES of coefficients
+    """
+    size = max(int(MAX_BLOCK_BYTES // (16 * period.size * max(x.shape[-1], 1))), 1)
+    for start in range(0, x.shape[0], size):
+        wave = wavelet(
+            x[start : start + size],
+            dt,
+            pad=pad,
+            dj=dj,
+            mother=mother,
+            param=-1 if param is None else param,
+            freq=1 / period,
+        )[0]
+        yield start, size, np.abs(wave) ** 2
+
+
+def _gws_kernel(x, dt, dj, pad, mother, param, scale, period, siglvl, lag1):
+    """
+    Global wavelet spectrum and its significance for series along axis -1
+    """
+    power = np.empty((x.shape[0], scale.size))
+    for start, size, block in _power(x, dt, dj, pad, mother, param, period):
+        power[start : start + size] = block.mean(axis=-1)
+    # the -scale corrects for padding at edges
+    dof = tuple(x.shape[-1] - scale)
+    factor = _signif_factor(1, dt, tuple(scale), siglvl, dof, mother, param)
+    variance, lag1 = _series_stats(x, lag1)
+    signif = _red_noise(lag1, variance, period, dt) * factor
+    return power, signif
+
+
+def _scale_avg_kernel(x, dt, dj, pad, mother, param, scale, period, siglvl, lag1, band):
+    """
+    Scale-averaged power [Eqn(24)] and its significance [Eqn(26)] for
+    series along axis -1
+    """
+    avg = (scale >= band[0]) & (scale <= band[1])
+    cdelta = _signif_constants(mother, param)[2][1]
+    power = np.empty(x.shape)
+    for start, size, block in _power(x, dt, dj, pad, mother, param, period[avg]):
+        power[start : start + size] = np.sum(block / scale[avg, np.newaxis], axis=-2)
+    power *= dj * dt / cdelta
+    # chi-square factor of [Eqn(26)], without the background spectrum
+    factor = _signif_factor(2, dt, tuple(scale), siglvl, band, mother, param)
+    factor = factor / np.sum(1 / scale[avg])
+    variance, lag1 = _series_stats(x, lag1)
+    theory = _red_noise(lag1, variance, period[avg], dt)
+    signif = factor * np.sum(theory / scale[avg], axis=-1)
+    return power, signif[..., np.newaxis]
+
+
+def _apply(x, kernel, sizes, **kwargs):
+    """
+    Run a kernel over the flattened series, leaving NaN for those with
+    missing data
+    """
+    shape = x.shape[:-1]
+    x = x.reshape(-1, x.shape[-1])
+    valid = ~np.isnan(x).any(axis=-1)
+    results = []
+    for output, size in zip(kernel(x[valid], **kwargs), sizes):
+        result = np.full((x.shape[0], size), np.nan)
+        result[valid] = output
+        results.append(result.reshape(shape + (size,)))
+    return tuple(results)
+
+
+def global_wavelet_spectrum(
+    da: xr.DataArray,
+    dim: str = "time",
+    dt: float = 1,
+    dj: float = 1 / 12,
+    s0: Optional[float] = None,
+    J1: Optional[float] = None,
+    pad: bool = True,
+    mother: str = "MORLET",
+    param: Optional[float] = None,
+    lag1="auto",
+    siglvl: float = 0.95,
+) -> xr.Dataset:
+    """
+    Time-averaged wavelet power and its significance for every series
+
+    Parameters
+    ----------
+    da : xr.DataArray
+        Field with a ``dim`` dimension, possibly dask backed. Series with
+        missing values give NaN
+    dim : str
+        Time dimension
+    dt, dj, s0, J1, pad, mother, param
+        Parameters of :func:`wavelet`
+    lag1 : "auto" or float
+        Lag-1 autocorrelation of the red noise background, "auto" fits it
+        at every grid point
+    siglvl : float
+        Significance level
+
+    Returns
+    -------
+    xr.Dataset
+        ``power`` and ``signif`` over the remaining dimensions and
+        ``period``. The significance uses ``N - scale`` degrees of freedom
+        in [Eqn(23)]
+    """
+    mother = mother.upper()
+    scale, period = _scales(da.sizes[dim], dt, dj, s0, J1, mother, param)
+    power, signif = xr.apply_ufunc(
+        _apply,
+        statistics._single_chunk(da, dim),
+        kwargs=dict(
+            kernel=_gws_kernel,
+            sizes=(scale.size, scale.size),
+            dt=dt,
+            dj=dj,
+            pad=pad,
+            mother=mother,
+            param=param,
+            scale=scale,
+            period=period,
+            siglvl=siglvl,
+            lag1=lag1,
+        ),
+        input_core_dims=[[dim]],
+        output_core_dims=[["period"], ["period"]],
+        dask="parallelized",
+        output_dtypes=[float, float],
+        dask_gufunc_kwargs={"output_sizes": {"period": scale.size}},
+    )
+    return xr.Dataset(
+        {"power": power, "signif": signif},
+        coords={"period": period, "scale": ("period", scale)},
+    )
+
+
+def scale_averaged_power(
+    da: xr.DataArray,
+    band: Sequence[float],
+    dim: str = "time",
+    dt: float = 1,
+    dj: float = 1 / 12,
+    s0: Optional[float] = None,
+    J1: Optional[float] = None,
+    pad: bool = True,
+    mother: str = "MORLET",
+    param: Optional[float] = None,
+    lag1="auto",
+    siglvl: float = 0.95,
+) -> xr.Dataset:
+    """
+    Wavelet power averaged over a band of scales and its significance for
+    every series
+
+    Only the scales inside the band are transformed.
+
+    Parameters
+    ----------
+    da : xr.DataArray
+        Field with a ``dim`` dimension, possibly dask backed. Series with
+        missing values give NaN
+    band : sequence of float
+        Scales ``[S1, S2]`` to average, in the units of ``dt`` as the
+        ``dof`` of :func:`wave_signif` with ``sigtest=2``
+    dim : str
+        Time dimension
+    dt, dj, s0, J1, pad, mother, param
+        Parameters of :func:`wavelet`
+    lag1 : "auto" or float
+        Lag-1 autocorrelation of the red noise background, "auto" fits it
+        at every grid point
+    siglvl : float
+        Significance level
+
+    Returns
+    -------
+    xr.Dataset
+        ``power`` over the dimensions of ``da`` and ``signif`` over the
+        remaining ones
+    """
+    mother = mother.upper()
+    scale, period = _scales(da.sizes[dim], dt, dj, s0, J1, mother, param)
+    band = (float(band[0]), float(band[1]))
+    if not ((scale >= band[0]) & (scale <= band[1])).any():
+        raise ValueError(f"No scales between {band[0]} and {band[1]}")
+    nt = da.sizes[dim]
+    power, signif = xr.apply_ufunc(
+        _apply,
+        statistics._single_chunk(da, dim),
+        kwargs=dict(
+            kernel=_scale_avg_kernel,
+            sizes=(nt, 1),
+            dt=dt,
+            dj=dj,
+            pad=pad,
+            mother=mother,
+            param=param,
+            scale=scale,
+            period=period,
+            siglvl=siglvl,
+            lag1=lag1,
+            band=band,
+        ),
+        input_core_dims=[[dim]],
+        output_core_dims=[[dim], ["_signif"]],
+        dask="parallelized",
+        output_dtypes=[float, float],
+        dask_gufunc_kwargs={"output_sizes": {"_signif": 1}},
+    )
+    return xr.Dataset(
+        {
+            "power": power.transpose(*da.dims),
+            "signif": signif.squeeze("_signif", drop=True),
+        },
+    )
@@ -0,0 +1,164 @@
+"""
+Online Morlet wavelet transform for series that grow one value at a time
+"""
+
+from typing import Optional
+
+import numpy as np
+import xarray as xr
+from scipy.signal import fftconvolve
+
+from .core import wave_bases
+
+
+class WaveletMonitor:
+    """
+    Morlet wavelet transform updated in place as new values arrive
+
+    The transform is evaluated in the time domain with the daughter
+    wavelets of :func:`wave_bases`, truncated at ``truncation`` scales from
+    their center. The monitor keeps the last inputs and, for every scale,
+    the coefficients of the most recent times. A new value only adds its
+    contribution to those coefficients, so an update costs
+    O(scales x kernel width) whatever the length of the record.
+
+    Away from the edges the coefficients match :func:`wavelet` up to the
+    truncation of the kernels, about ``exp(-truncation**2 / 2)`` relative to
+    the largest kernel value, for scales above about ``4 * dt``. Smaller
+    scales put the Morlet peak frequency near the Nyquist frequency, where
+    the band-limited daughter wavelets have long tails that the truncation
+    cuts. Coefficients closer to the newest (or oldest) value than the
+    e-folding time ``sqrt(2) * scale`` are flagged as inside the cone of
+    influence; they change as new values arrive.
+
+    Args:
+        dt (float): Sampling interval.
+                        Default: 1
+        dj (float): Spacing between scales in octaves.
+                        Default: 1/12
+        s0 (float): Smallest scale.
+                        Default: 2 * dt
+        J1 (int): Number of scales minus one.
+                        Default: 8 octaves
+        param (float): Morlet nondimensional frequency.
+                        Default: 6
+        truncation (float): Half width of the kernels in units of scale.
+                        Default: 4
+        mean (float): Value removed from the inputs, e.g. a climatological mean.
+                        Default: 0
+    """
+
+    def __init__(
+        self,
+        dt: float = 1,
+        dj: float = 1 / 12,
+        s0: Optional[float] = None,
+        J1: Optional[int] = None,
+        param: float = 6.0,
+        truncation: float = 4.0,
+        mean: float = 0.0,
+    ):
+        if s0 is None:
+            s0 = 2 * dt
+        if J1 is None:
+            J1 = int(round(8 / dj))
+        self.dt = dt
+        self.mean = mean
+        self.scale = s0 * 2.0 ** (np.arange(0, J1 + 1) * dj)
+        self.width = np.maximum(np.ceil(truncation * self.scale / dt).astype(int), 1)
+        self.H = int(self.width.max())
+
+        # daughter wavelets on a grid long enough to hold every kernel
+        n = 2 ** int(np.ceil(np.log2(4 * self.H + 1)))
+        k = np.fft.fftfreq(n, dt) * 2 * np.pi
+        daughter, fourier_factor, coi, _ = wave_bases("MORLET", k, self.scale, param)
+        self.period = self.scale * fourier_factor
+        self.coi_factor = coi
+        impulse = np.fft.ifft(daughter, axis=-1)
+        # K[:, H + j] weights the value j steps after the coefficient time
+        lags = np.arange(-self.H, self.H + 1)
+        self.kernel = impulse[:, -lags % n]
+        self.kernel[np.abs(lags) > self.width[:, np.newaxis]] = 0
+
+        self.count = 0
+        self._inputs = np.zeros(self.H)
+        self._wave = np.zeros((self.scale.size, self.H + 1), dtype=complex)
+
+    def update(self, value: float) -> np.ndarray:
+        """
+        Add a single value and return the coefficients at its time
+
+        Parameters
+        ----------
+        value : float
+            Newest value of the series
+
+        Returns
+        -------
+        np.ndarray
+            Complex coefficients of every scale at the newest time, all of
+            them inside the cone of influence
+        """
+        H = self.H
+        N = self.count
+        x = value - self.mean
+        past = self._inputs[(N - np.arange(1, H + 1)) % H]
+        self._wave[:, N % (H + 1)] = self.kernel[:, H - 1 :: -1] @ past
+        self._wave[:, (N - np.arange(H + 1)) % (H + 1)] += x * self.kernel[:, H:]
+        self._inputs[N % H] = x
+        self.count += 1
+        return self._wave[:, N % (H + 1)].copy()
+
+    def extend(self, values) -> None:
+        """
+        Add several values at once
+
+        Only the last ``2 H + 1`` values can still change the stored
+        coefficients, so the state is rebuilt from them with a single FFT
+        correlation, which is the cheapest way to start a monitor from a
+        long history.
+        """
+        values = np.asarray(values, dtype=float) - self.mean
+        if values.size == 0:
+            return
+        H = self.H
+        N = self.count + values.size - 1
+        # last 2H + 1 inputs up to N, zeros before the start of the record
+        recent = np.concatenate(
+            (self._inputs[(self.count - np.arange(2 * H, 0, -1)) % H], values)
+        )[-(2 * H + 1) :]
+        recent[: max(2 * H - N, 0)] = 0
+        xpad = np.concatenate((recent, np.zeros(H)))
+        wave = fftconvolve(
+            xpad[np.newaxis, :], self.kernel[:, ::-1], mode="valid", axes=-1
+        )
+        self._wave[:, (N - H + np.arange(H + 1)) % (H + 1)] = wave
+        self._inputs[(N - np.arange(H)) % H] = recent[::-1][:H]
+        self.count = N + 1
+
+    @property
+    def coefficients(self) -> xr.Dataset:
+        """
+        Coefficients of the most recent times and their cone of influence flag
+
+        ``lag`` counts the steps back from the newest value. Times before
+        the first value are NaN.
+        """
+        lags = np.arange(self.H + 1)
+        times = self.count - 1 - lags
+        wave = self._wave[:, times % (self.H + 1)]
+        wave[:, times < 0] = np.nan
+        # e-folding time sqrt(2) * scale [Sec.3g]
+        efold = (self.period / self.coi_factor)[:, np.newaxis]
+        coi = (lags * self.dt < efold) | (times * self.dt < efold)
+        return xr.Dataset(
+            {
+                "wave": (["period", "lag"], wave),
+                "coi": (["period", "lag"], coi),
+            },
+            coords={
+                "period": self.period,
+                "scale": ("period", self.scale),
+                "lag": lags,
+            },
+        )
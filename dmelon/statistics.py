@@ -3,21 +3,373 @@ Statistics module
 """
 
 import numpy as np
+import xarray as xr
 
 
 def edof(N, window, overlap):
     """
     Function to compute the effective degrees of freedom
+
+    Parameters
+    ----------
+    N : int
+        Length of the record
+    window : array_like
+        Window applied to each segment
+    overlap : int
+        Number of points shared by two consecutive segments
     """
+    window = np.asarray(window, dtype=float)
     window = window / np.linalg.norm(window)
     nskip = window.size - overlap
     nseg = np.ceil(N / nskip) + 1
     num = 2 * nseg
-    den = 0
-    for m in range(1, np.around(nseg).astype(np.int)):
-        upper_limit = m * nskip
-        b = np.zeros_like(window)
-        b[: len(window[upper_limit:])] = window[upper_limit:]
-        den += (1 - (m / nseg)) * np.dot(window, b) ** 2
+
+    # the overlap between segments only depends on the window, so
+    # its autocorrelation is computed once through the FFT and sampled
+    # at every lag
+    m = np.arange(1, int(np.around(nseg)))
+    lags = m * nskip
+    valid = lags < window.size
+    rho = _lagged_products(window, window.size - 1)[lags[valid]]
+    den = np.sum((1 - (m[valid] / nseg)) * rho**2)
     den = 1 + 2 * den
     return num / den
+
+
+def _next_fast_len(n):
+    """
+    Power of two larger or equal than n
+    """
+    return 2 ** int(np.ceil(np.log2(n)))
+
+
+def _lagged_products(x, nlags):
+    """
+    Sum of the lagged products of x along its last axis for lags 0..nlags,
+    computed through the FFT
+    """
+    N = x.shape[-1]
+    nfft = _next_fast_len(2 * N - 1)
+    spec = np.fft.rfft(x, n=nfft, axis=-1)
+    return np.fft.irfft(spec * spec.conj(), n=nfft, axis=-1)[..., : nlags + 1]
+
+
+def _acf(x, nlags=1):
+    """
+    Autocorrelation of x along its last axis for lags 0..nlags
+    """
+    N = x.shape[-1]
+    x = x - x.mean(axis=-1, keepdims=True)
+    sums = _lagged_products(x, nlags)
+    cov = sums / (N - np.arange(nlags + 1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return cov / (sums[..., :1] / N)
+
+
+def _ar1(x):
+    """
+    Lag-1 autocorrelation and noise amplitude of an AR(1) process fitted
+    to x along its last axis
+    """
+    N = x.shape[-1]
+    x = x - x.mean(axis=-1, keepdims=True)
+    sums = _lagged_products(x, 1)
+    c0 = sums[..., 0] / N
+    c1 = sums[..., 1] / (N - 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        g = c1 / c0
+    a = np.sqrt((1 - g**2) * c0)
+    return g, a
+
+
+def _single_chunk(xrobj, dim):
+    """
+    Make sure the core dimension is held in a single dask chunk
+    """
+    if xrobj.chunks is not None:
+        xrobj = xrobj.chunk({dim: -1})
+    return xrobj
+
+
+def autocorrelation(da, dim="time", nlags=1):
+    """
+    Lag-k autocorrelation along `dim` for every point of a gridded field
+
+    Parameters
+    ----------
+    da : xarray.DataArray
+        Input field, e.g. [time, lat, lon]. Dask arrays are processed
+        lazily chunk by chunk over the remaining dimensions.
+    dim : str
+        Dimension along which to compute the autocorrelation
+    nlags : int
+        Maximum lag to compute
+
+    Returns
+    -------
+    xarray.DataArray
+        Autocorrelation with a new `lag` dimension
+    """
+    da = _single_chunk(da, dim)
+    acf = xr.apply_ufunc(
+        _acf,
+        da,
+        input_core_dims=[[dim]],
+        output_core_dims=[["lag"]],
+        kwargs={"nlags": nlags},
+        dask="parallelized",
+        output_dtypes=[float],
+        dask_gufunc_kwargs={"output_sizes": {"lag": nlags + 1}},
+    )
+    acf = acf.assign_coords(lag=np.arange(nlags + 1))
+    acf.name = "autocorrelation"
+    return acf
+
+
+def ar1(da, dim="time"):
+    """
+    Fit an AR(1) process along `dim` for every point of a gridded field
+
+    Returns
+    -------
+    xarray.Dataset
+        Lag-1 autocorrelation `g` and noise amplitude `a`
+    """
+    da = _single_chunk(da, dim)
+    g, a = xr.apply_ufunc(
+        _ar1,
+        da,
+        input_core_dims=[[dim]],
+        output_core_dims=[[], []],
+        dask="parallelized",
+        output_dtypes=[float, float],
+    )
+    return xr.Dataset({"g": g, "a": a})
+
+
+def effective_sample_size(x, y=None, dim="time"):
+    """
+    Effective sample size of a field, or of the correlation between two
+    fields, assuming AR(1) persistence (Bretherton et al. 1999)
+
+    .. math::
+        N_{eff} = N \\frac{1 - r_x r_y}{1 + r_x r_y}
+    """
+    N = x.sizes[dim]
+    rx = ar1(x, dim=dim).g
+    ry = rx if y is None else ar1(y, dim=dim).g
+    rr = (rx * ry).clip(min=0)
+    neff = (N * (1 - rr) / (1 + rr)).clip(max=N)
+    neff.name = "effective_sample_size"
+    return neff
+
+
+def correlation_significance(x, y, dim="time", siglvl=0.95):
+    """
+    Pearson correlation map between two fields and its two-sided
+    significance, using the effective sample size to account for
+    the autocorrelation of both fields
+
+    Returns
+    -------
+    xarray.Dataset
+        Correlation `r`, effective sample size `neff`, `pvalue` and
+        the `significant` mask at the `siglvl` confidence level
+    """
+    from scipy.stats import t as student_t
+
+    r = xr.corr(x, y, dim=dim)
+    neff = effective_sample_size(x, y, dim=dim)
+    dof = (neff - 2).clip(min=1)
+    tstat = r * np.sqrt(dof / (1 - r**2).clip(min=np.finfo(float).tiny))
+    pvalue = xr.apply_ufunc(
+        lambda t, df: 2 * student_t.sf(np.abs(t), df),
+        tstat,
+        dof,
+        dask="parallelized",
+        output_dtypes=[float],
+    )
+    return xr.Dataset(
+        {
+            "r": r,
+            "neff": neff,
+            "pvalue": pvalue,
+            "significant": pvalue < (1 - siglvl),
+        },
+    )
+
+
+def _eof_weights(da, weights, lat):
+    """
+    Square root of the area weights broadcast to the spatial dimensions
+    """
+    if weights is None:
+        return None
+    if isinstance(weights, str):
+        if weights != "coslat":
+            raise ValueError(
+                f"Unknown weights {weights!r}, use 'coslat' or a DataArray"
+            )
+        if lat not in da.coords:
+            raise ValueError(
+                f"No latitude coordinate {lat!r} for the 'coslat' weights, name it "
+                "with 'lat' or pass weights=None or a DataArray"
+            )
+        weights = np.sqrt(np.cos(np.deg2rad(da[lat])).clip(min=0))
+    return weights.broadcast_like(da).transpose(*da.dims)
+
+
+def eof(
+    da,
+    neofs=10,
+    dim="time",
+    weights="coslat",
+    lat="lat",
+    method="auto",
+    n_power_iter=2,
+    n_oversamples=10,
+    neff=None,
+    seed=0,
+):
+    """
+    Empirical orthogonal functions of a gridded field computed out of core
+
+    A first pass over the time chunks gives the mask, mean and variance of
+    every grid point. The weighted anomalies are then decomposed either
+    with an incremental tall-skinny QR (``"tsqr"``, exact), which keeps an
+    R factor of the size of the valid grid points squared, or with a
+    randomized SVD (``"randomized"``, Halko et al. 2011) that reads the
+    time chunks again at each of its ``2 * n_power_iter + 2`` passes and
+    only keeps matrices of ``neofs + n_oversamples`` columns. Either way
+    the field is never held in memory, only a few chunks at a time.
+
+    EOFs are oriented to have a positive sum.
+
+    Parameters
+    ----------
+    da : xarray.DataArray
+        Field with a ``dim`` dimension, e.g. [time, lat, lon]. Keep it
+        chunked along ``dim`` for large fields. Grid points with any missing
+        value are left out
+    neofs : int
+        Number of modes to return
+    dim : str
+        Sampling dimension
+    weights : "coslat", xarray.DataArray or None
+        ``"coslat"`` weights each point by the square root of the cosine
+        of its latitude. A DataArray over the spatial dimensions is used as
+        given as the square root of the area weights, i.e. it multiplies the
+        anomalies
+    lat : str
+        Latitude coordinate of the ``"coslat"`` weights
+    method : {"auto", "tsqr", "randomized"}
+        ``"auto"`` picks ``"tsqr"`` when the valid grid points are fewer
+        than the samples of a time chunk, so that the R factor is not larger
+        than a chunk
+    n_power_iter, n_oversamples, seed
+        Parameters of :func:`dask.array.linalg.svd_compressed`
+    neff : float, optional
+        Effective number of independent samples of the North et al. (1982)
+        errors, the length of ``dim`` by default
+
+    Returns
+    -------
+    xarray.Dataset
+        ``eofs`` of the weighted anomalies over ``mode`` and the spatial
+        dimensions, ``pcs`` over ``dim`` and ``mode``, ``eigenvalues``,
+        ``variance_fraction`` and the ``eigenvalue_error`` and
+        ``variance_fraction_error`` of the North rule of thumb
+    """
+    import dask
+    import dask.array as dsa
+
+    da = da.transpose(dim, ...)
+    space = da.dims[1:]
+    T = da.sizes[dim]
+    stacked = da.stack(_space=space)
+    X = stacked.data
+    if not isinstance(X, dsa.Array):
+        X = dsa.from_array(X, chunks=("auto", -1))
+
+    # a single pass gives the mask, the mean and the variance of every point
+    mean, variance = dask.compute(X.mean(axis=0), X.var(axis=0, ddof=1))
+    valid = np.flatnonzero(np.isfinite(mean))
+    if valid.size < neofs:
+        raise ValueError(f"Only {valid.size} valid grid points for {neofs} modes")
+    sqrt_weights = _eof_weights(da.isel({dim: 0}, drop=True), weights, lat)
+    if sqrt_weights is None:
+        sqrt_weights = np.ones(valid.size)
+    else:
+        sqrt_weights = sqrt_weights.stack(_space=space).values[valid]
+    X = (X[:, valid] - mean[valid]) * sqrt_weights
+    total = np.sum(variance[valid] * sqrt_weights**2)
+
+    X = X.rechunk({1: -1})
+    if method == "auto":
+        method = "tsqr" if valid.size <= min(T, max(X.chunks[0])) else "randomized"
+    if method == "tsqr":
+        from scipy.linalg import qr, svd
+
+        # incremental TSQR: time chunks are folded into the R factor once
+        # they add up to as many rows, the PCs are then the projections of
+        # the anomalies on the EOFs
+        R = np.empty((0, valid.size))
+        blocks = []
+        for i in range(X.numblocks[0]):
+            blocks.append(X.blocks[i, 0].compute())
+            if sum(map(len, blocks)) >= valid.size or i == X.numblocks[0] - 1:
+                stacked_rows = np.concatenate([R, *blocks])
+                (R,) = qr(stacked_rows, mode="r", overwrite_a=True, check_finite=False)
+                R, blocks = R[: valid.size], []
+        _, S, Vt = svd(R, full_matrices=False, overwrite_a=True, check_finite=False)
+        S, Vt = S[:neofs], Vt[:neofs]
+        pcs = (X @ Vt.T).compute()
+    elif method == "randomized":
+        # compute=True streams X at every pass instead of keeping it in memory
+        U, S, Vt = dsa.linalg.svd_compressed(
+            X,
+            neofs,
+            n_power_iter=n_power_iter,
+            n_oversamples=n_oversamples,
+            seed=seed,
+            compute=True,
+        )
+        U, S, Vt = dask.compute(U, S, Vt)
+        pcs = U * S
+    else:
+        raise ValueError(f"Unknown method {method!r}, use 'tsqr' or 'randomized'")
+    # orient every EOF to a positive sum, whatever the solver
+    signs = np.where(Vt.sum(axis=1) < 0, -1.0, 1.0)
+    Vt, pcs = Vt * signs[:, np.newaxis], pcs * signs
+
+    modes = np.arange(neofs)
+    patterns = np.full((neofs, stacked.sizes["_space"]), np.nan)
+    patterns[:, valid] = Vt
+    eofs = xr.DataArray(
+        patterns,
+        dims=["mode", "_space"],
+        coords={"mode": modes, "_space": stacked["_space"]},
+    ).unstack("_space")
+    eofs = eofs.transpose("mode", *space).assign_coords(
+        {name: da[name] for name in space if name in da.coords}
+    )
+    pcs = xr.DataArray(
+        pcs,
+        dims=[dim, "mode"],
+        coords={"mode": modes, dim: da[dim]} if dim in da.coords else {"mode": modes},
+    )
+    eigenvalues = xr.DataArray(S**2 / (T - 1), dims=["mode"], coords={"mode": modes})
+    fraction = eigenvalues / total
+    error = np.sqrt(2 / (T if neff is None else neff))
+    return xr.Dataset(
+        {
+            "eofs": eofs,
+            "pcs": pcs,
+            "eigenvalues": eigenvalues,
+            "variance_fraction": fraction,
+            "eigenvalue_error": eigenvalues * error,
+            "variance_fraction_error": fraction * error,
+        },
+        attrs={"method": method},
+    )
@@ -2,6 +2,7 @@
 Helper functions that fit into a more general category
 """
 
+import hashlib
 import json
 import os
 import warnings
@@ -10,7 +11,8 @@ from typing import Optional
 import geopandas as gpd
 import numpy as np
 import pandas as pd
-from geopandas.tools import sjoin
+import shapely
+import xarray as xr
 
 
 def check_folder(base_path: str, name: Optional[str] = None) -> None:
@@ -38,18 +40,161 @@ def findPointsInPolys(
     pandas_df: pd.DataFrame,
     shape_df: gpd.GeoDataFrame,
     crs: str = "EPSG:4326",
+    chunksize: int = 1_000_000,
+    cache_dir: Optional[str] = None,
+    id_column: str = "file",
 ) -> gpd.GeoDataFrame:
     """
     Filter DataFrame by their spatial location within a
     GeoDataFrame
+
+    The output is the same as an inner spatial join with the ``within``
+    predicate, but only the rows inside the bounding box of the shapes are
+    turned into points and tested against an STRtree of the shapes, in
+    chunks of ``chunksize`` rows to bound the memory usage.
+
+    If ``cache_dir`` is given, the membership of every profile is stored
+    there keyed by its ``id_column`` value and a hash of the shapes, so
+    later calls with the same shapes only test the profiles that were
+    not classified before.
     """
+    lon = pandas_df.longitude.to_numpy(dtype=float)
+    lat = pandas_df.latitude.to_numpy(dtype=float)
+    if cache_dir is None:
+        point_idx, shape_idx = _points_in_polys_index(
+            lon,
+            lat,
+            shape_df.geometry.values,
+            chunksize=chunksize,
+        )
+    else:
+        point_idx, shape_idx = _cached_points_in_polys_index(
+            pandas_df[id_column],
+            lon,
+            lat,
+            shape_df,
+            cache_dir,
+            chunksize=chunksize,
+        )
+
+    matched = pandas_df.iloc[point_idx]
+    shape_attrs = shape_df.drop(columns=shape_df.geometry.name).iloc[shape_idx]
+
+    # same suffixes as geopandas.sjoin for the columns in both frames
+    common = matched.columns.intersection(shape_attrs.columns)
+    matched = matched.rename(columns={col: f"{col}_left" for col in common})
+    shape_attrs = shape_attrs.rename(columns={col: f"{col}_right" for col in common})
+
     argo_geodf = gpd.GeoDataFrame(
-        pandas_df,
-        geometry=gpd.points_from_xy(pandas_df.longitude, pandas_df.latitude, crs=crs),
+        matched,
+        geometry=gpd.points_from_xy(
+            pandas_df.longitude.to_numpy()[point_idx],
+            pandas_df.latitude.to_numpy()[point_idx],
+            crs=crs,
+        ),
     )
+    argo_geodf["index_right"] = shape_df.index[shape_idx]
+    for column in shape_attrs.columns:
+        argo_geodf[column] = shape_attrs[column].to_numpy()
+    return argo_geodf
+
+
+def _points_in_polys_index(
+    lon: np.ndarray,
+    lat: np.ndarray,
+    geometries: np.ndarray,
+    chunksize: int = 1_000_000,
+):
+    """
+    Positional indices of the (point, shape) pairs where the point lies
+    within the shape, sorted by point and then by shape
+    """
+    tree = shapely.STRtree(geometries)
+    minx, miny, maxx, maxy = shapely.total_bounds(geometries)
+
+    pairs = []
+    for start in range(0, lon.size, chunksize):
+        _lon = lon[start : start + chunksize]
+        _lat = lat[start : start + chunksize]
+        # cheap prefilter on the raw coordinates before building any point
+        candidates = np.flatnonzero(
+            (_lon >= minx) & (_lon <= maxx) & (_lat >= miny) & (_lat <= maxy),
+        )
+        points = shapely.points(_lon[candidates], _lat[candidates])
+        _point_idx, _shape_idx = tree.query(points, predicate="within")
+        pairs.append((candidates[_point_idx] + start, _shape_idx))
+
+    if not pairs:
+        return np.array([], dtype=int), np.array([], dtype=int)
+    point_idx = np.concatenate([pair[0] for pair in pairs])
+    shape_idx = np.concatenate([pair[1] for pair in pairs])
+    order = np.lexsort((shape_idx, point_idx))
+    return point_idx[order], shape_idx[order]
+
+
+def _geometry_hash(shape_df: gpd.GeoDataFrame) -> str:
+    """
+    Hash of the ordered geometries and CRS of a GeoDataFrame
+    """
+    digest = hashlib.sha1(str(shape_df.crs).encode())
+    for wkb in shapely.to_wkb(shape_df.geometry.values):
+        digest.update(wkb)
+    return digest.hexdigest()
 
-    # Return spatial join to filer out values outside the shapefile
-    return sjoin(argo_geodf, shape_df, predicate="within", how="inner")
+
+def _cached_points_in_polys_index(
+    ids: pd.Series,
+    lon: np.ndarray,
+    lat: np.ndarray,
+    shape_df: gpd.GeoDataFrame,
+    cache_dir: str,
+    chunksize: int = 1_000_000,
+):
+    """
+    Same as `_points_in_polys_index` but only testing the profiles
+    missing from the membership cache of the shapes
+    """
+    ids = pd.Index(ids)
+    if not ids.is_unique:
+        raise ValueError(f"Profile identifiers in '{ids.name}' must be unique")
+
+    check_folder(cache_dir)
+    cache_path = os.path.join(cache_dir, f"{_geometry_hash(shape_df)}.pkl")
+    if os.path.exists(cache_path):
+        cache = pd.read_pickle(cache_path)
+    else:
+        cache = {
+            "classified": pd.Index([], dtype=object),
+            "pairs": pd.DataFrame({"id": pd.Series([], dtype=object), "shape": []}),
+        }
+
+    new = np.flatnonzero(~ids.isin(cache["classified"]))
+    if new.size > 0:
+        _point_idx, _shape_idx = _points_in_polys_index(
+            lon[new],
+            lat[new],
+            shape_df.geometry.values,
+            chunksize=chunksize,
+        )
+        cache["classified"] = cache["classified"].append(ids[new])
+        cache["pairs"] = pd.concat(
+            [
+                cache["pairs"],
+                pd.DataFrame({"id": ids[new[_point_idx]], "shape": _shape_idx}),
+            ],
+            ignore_index=True,
+        )
+        tmp_path = f"{cache_path}.tmp"
+        pd.to_pickle(cache, tmp_path)
+        os.replace(tmp_path, cache_path)
+
+    # the cache may hold profiles that are not part of this query
+    point_idx = ids.get_indexer(cache["pairs"]["id"])
+    valid = point_idx >= 0
+    point_idx = point_idx[valid]
+    shape_idx = cache["pairs"]["shape"].to_numpy(dtype=int)[valid]
+    order = np.lexsort((shape_idx, point_idx))
+    return point_idx[order], shape_idx[order]
 
 
 # Piece of code from xmip that I am testing
@@ -67,35 +212,37 @@ def _interp_nominal_lon(lon_1d):
     return np.interp(x, x[~idx], lon_1d[~idx], period=len(lon_1d))
 
 
+def _fix_non_unique(data, pad=False):
+    """remove duplicate values by linear interpolation
+    if values are non-unique. `pad` if the last two points are the same
+    pad with -90 or 90. This is only applicable to lat values"""
+    _, indicies = np.unique(data, return_index=True)
+    if len(data) == len(indicies):
+        return data
+    data = data.copy()
+    # pad each end with the other end.
+    if pad:
+        if data[0] == data[1]:
+            data[0] = -90
+        if data[-2] == data[-1]:
+            data[-1] = 90
+        _, indicies = np.unique(data, return_index=True)
+
+    ii_range = np.arange(len(data))
+    double_idx = np.ones(len(data), dtype=bool)
+    double_idx[indicies] = False
+    data[double_idx] = np.interp(
+        ii_range[double_idx],
+        ii_range[~double_idx],
+        data[~double_idx],
+    )
+    return data
+
+
 def replace_x_y_nominal_lat_lon(ds):
     """Approximate the dimensional values of x and y with mean lat and lon at the equator"""
     ds = ds.copy()
 
-    def maybe_fix_non_unique(data, pad=False):
-        """remove duplicate values by linear interpolation
-        if values are non-unique. `pad` if the last two points are the same
-        pad with -90 or 90. This is only applicable to lat values"""
-        if len(data) == len(np.unique(data)):
-            return data
-        else:
-            # pad each end with the other end.
-            if pad:
-                if len(np.unique([data[0:2]])) < 2:
-                    data[0] = -90
-                if len(np.unique([data[-2:]])) < 2:
-                    data[-1] = 90
-
-            ii_range = np.arange(len(data))
-            _, indicies = np.unique(data, return_index=True)
-            double_idx = np.array([ii not in indicies for ii in ii_range])
-            # print(f"non-unique values found at:{ii_range[double_idx]})")
-            data[double_idx] = np.interp(
-                ii_range[double_idx],
-                ii_range[~double_idx],
-                data[~double_idx],
-            )
-            return data
-
     if "x" in ds.dims and "y" in ds.dims:
         # define 'nominal' longitude/latitude values
         # latitude is defined as the max value of `lat` in the zonal direction
@@ -106,28 +253,34 @@ def replace_x_y_nominal_lat_lon(ds):
         # and southern edge, and
         eq_idx = len(ds.y) // 2
 
-        nominal_x = ds.isel(y=eq_idx).lon.load()
-        nominal_y = ds.lat.max("x").load()
+        # only the 1D reductions are computed, in a single pass
+        nominal = xr.Dataset(
+            {
+                "nominal_x": ds.lon.isel(y=eq_idx).reset_coords(drop=True),
+                "nominal_y": ds.lat.max("x").reset_coords(drop=True),
+            },
+        ).compute()
 
         # interpolate nans
         # Special treatment for gaps in longitude
-        nominal_x = _interp_nominal_lon(nominal_x.data)
-        nominal_y = nominal_y.interpolate_na("y").data
+        nominal_x = _interp_nominal_lon(nominal.nominal_x.data)
+        nominal_y = nominal.nominal_y.interpolate_na("y").data
 
         # eliminate non unique values
         # these occour e.g. in "MPI-ESM1-2-HR"
-        nominal_y = maybe_fix_non_unique(nominal_y)
-        nominal_x = maybe_fix_non_unique(nominal_x)
+        nominal_y = _fix_non_unique(nominal_y)
+        nominal_x = _fix_non_unique(nominal_x)
 
-        ds = ds.assign_coords(x=nominal_x, y=nominal_y)
-        ds = ds.sortby("x")
-        ds = ds.sortby("y")
+        # sort both dimensions at once, the data stays lazy
+        x_order = np.argsort(nominal_x, kind="stable")
+        y_order = np.argsort(nominal_y, kind="stable")
+        ds = ds.isel(x=x_order, y=y_order)
 
         # do one more interpolation for the x values, in case the boundary values were
         # affected
         ds = ds.assign_coords(
-            x=maybe_fix_non_unique(ds.x.load().data),
-            y=maybe_fix_non_unique(ds.y.load().data, pad=True),
+            x=_fix_non_unique(nominal_x[x_order]),
+            y=_fix_non_unique(nominal_y[y_order], pad=True),
         )
 
     else:
@@ -0,0 +1,296 @@
+"""
+Golden-output harness for the numerical kernels.
+
+Every kernel has a frozen copy of its original implementation (the
+"reference" mode) next to the one shipped in the package (the "fast"
+mode). The outputs of the reference mode on fixed synthetic inputs are
+stored in ``tests/data/golden`` and the fast mode has to match them
+within the tolerances below:
+
+=================  =========  =========  ===================================
+Kernel             rtol       atol       Notes
+=================  =========  =========  ===================================
+hermite_function   1e-10      1e-14      float128 reference, compared as f8
+wave_bases         1e-12      1e-14      all mothers, complex daughters
+chisquare_inv      1e-4       0          fminbound with xtol=1e-4
+spectral_window    1e-12      1e-14      Lanczos low-pass coefficients
+=================  =========  =========  ===================================
+
+Run ``python -m tests.golden`` to compare both modes side by side and
+``python -m tests.golden --regenerate`` to rewrite the stored outputs from
+the reference mode.
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+from scipy.optimize import fminbound
+from scipy.special import eval_hermite, factorial, gamma, gammainc
+
+from dmelon.ocean import bm95
+from dmelon.spectral import filters
+from dmelon.spectral.wavelet import core
+
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), "data", "golden")
+
+
+# reference implementations, frozen copies of the original kernels
+
+
+def hermite_function_reference(n, x):
+    """Hermite function of order n at x using extended precision"""
+    n = np.atleast_2d(n)
+    x = np.atleast_2d(x)
+    coef = np.sqrt((2**n) * factorial(n) * np.sqrt(np.pi)) * np.exp(
+        (x**2) / 2,
+        dtype=np.longdouble,
+    )
+    return eval_hermite(n, x) / coef
+
+
+def wave_bases_reference(mother, k, scale, param=None):
+    """Wavelet function in Fourier space"""
+    n = len(k)
+    kplus = np.array(k > 0.0, dtype=float)
+    scale = scale[..., np.newaxis]
+    k = k[np.newaxis, ...]
+    if mother == "MORLET":
+        if param is None:
+            param = 6.0
+        expnt = -((scale * k - param) ** 2) / 2.0 * kplus
+        norm = np.sqrt(scale * k[0][1]) * (np.pi ** (-0.25)) * np.sqrt(n)
+        daughter = norm * np.exp(expnt) * kplus
+        fourier_factor = (4 * np.pi) / (param + np.sqrt(2 + param**2))
+        dofmin = 2
+    elif mother == "PAUL":
+        if param is None:
+            param = 4.0
+        expnt = -scale * k * kplus
+        norm_bottom = np.sqrt(param * np.prod(np.arange(1, (2 * param))))
+        norm = np.sqrt(scale * k[0][1]) * (2**param / norm_bottom) * np.sqrt(n)
+        daughter = norm * ((scale * k) ** param) * np.exp(expnt) * kplus
+        fourier_factor = 4 * np.pi / (2 * param + 1)
+        dofmin = 2
+    elif mother == "DOG":
+        if param is None:
+            param = 2.0
+        expnt = -((scale * k) ** 2) / 2.0
+        norm = np.sqrt(scale * k[0][1] / gamma(param + 0.5)) * np.sqrt(n)
+        daughter = -norm * (1j**param) * ((scale * k) ** param) * np.exp(expnt)
+        fourier_factor = 2 * np.pi * np.sqrt(2.0 / (2 * param + 1))
+        dofmin = 1
+    coi = fourier_factor / np.sqrt(2)
+    return daughter, fourier_factor, coi, dofmin
+
+
+def _chisquare_solve_reference(XGUESS, P, V):
+    """Distance between the guessed and target probabilities"""
+    PGUESS = gammainc(V / 2, V * XGUESS / 2)
+    PDIFF = np.abs(PGUESS - P)
+    if PGUESS >= 1 - 1e-4:
+        PDIFF = XGUESS
+    return PDIFF
+
+
+def chisquare_inv_reference(P, V):
+    """Inverse of the chi-square distribution by bounded minimization"""
+    if P == 0.95 and V == 2:
+        return 5.9915
+    MINN = 0.01
+    MAXX = 1
+    X = 1
+    TOLERANCE = 1e-4
+    while (X + TOLERANCE) >= MAXX:
+        MAXX = MAXX * 10.0
+        X = fminbound(
+            _chisquare_solve_reference, MINN, MAXX, args=(P, V), xtol=TOLERANCE
+        )
+        MINN = MAXX
+    return X * V
+
+
+def spectral_window_reference(coef, N):
+    """Spectral window of a series of filter coefficients"""
+    Ff = np.atleast_2d(np.arange(0, 1 + 1e-9, 2 / N)).T
+    window = coef[0] + 2 * np.sum(
+        np.atleast_2d(coef[1:])
+        * np.cos(np.atleast_2d(np.arange(1, len(coef))) * np.pi * Ff),
+        axis=-1,
+    )
+    return window, Ff
+
+
+# fixed synthetic inputs
+
+
+def _hermite_cases():
+    """Orders and points of the Hermite functions"""
+    x = np.linspace(-6, 6, 241)
+    return [{"n": np.atleast_2d(np.arange(16)).T, "x": x}, {"n": 0, "x": x}]
+
+
+def _wave_bases_cases():
+    """Wavenumbers and scales for every mother wavelet"""
+    n, dt = 256, 1.0
+    k = np.concatenate((np.arange(0, n // 2 + 1), np.arange((n - 1) // 2 * -1, 0)))
+    k = k * 2 * np.pi / (n * dt)
+    scale = 2 * dt * 2.0 ** (np.arange(0, 29) / 4)
+    return [
+        {"mother": mother, "k": k, "scale": scale, "param": param}
+        for mother, param in [
+            ("MORLET", 6.0),
+            ("PAUL", 4.0),
+            ("DOG", 2.0),
+            ("DOG", 6.0),
+        ]
+    ]
+
+
+def _chisquare_cases():
+    """Significance levels and degrees of freedom"""
+    return [{"P": P, "V": V} for P in [0.9, 0.95, 0.99] for V in [1, 2, 5.5, 10, 30]]
+
+
+def _spectral_window_cases():
+    """Lanczos low-pass coefficients on records of different length"""
+    coef = filters.lanczos_filter_coef(1 / 30 / 0.5, 100)[0]
+    return [{"coef": coef, "N": N} for N in [365, 1000, 4096]]
+
+
+KERNELS = {
+    "hermite_function": {
+        "reference": hermite_function_reference,
+        "fast": bm95.hermite_function,
+        "cases": _hermite_cases,
+        "rtol": 1e-10,
+        "atol": 1e-14,
+    },
+    "wave_bases": {
+        "reference": wave_bases_reference,
+        "fast": core.wave_bases,
+        "cases": _wave_bases_cases,
+        "rtol": 1e-12,
+        "atol": 1e-14,
+    },
+    "chisquare_inv": {
+        "reference": chisquare_inv_reference,
+        "fast": core.chisquare_inv,
+        "cases": _chisquare_cases,
+        "rtol": 1e-4,
+        "atol": 0,
+    },
+    "spectral_window": {
+        "reference": spectral_window_reference,
+        "fast": filters.spectral_window,
+        "cases": _spectral_window_cases,
+        "rtol": 1e-12,
+        "atol": 1e-14,
+    },
+}
+
+
+def _as_arrays(output):
+    """Flatten a kernel output into a list of double precision arrays"""
+    if not isinstance(output, tuple):
+        output = (output,)
+    arrays = []
+    for value in output:
+        value = np.asarray(value)
+        dtype = complex if np.iscomplexobj(value) else float
+        arrays.append(value.astype(dtype))
+    return arrays
+
+
+def run(name, mode="fast"):
+    """
+    Run a kernel in "reference" or "fast" mode over all of its cases,
+    returning a mapping of output keys to arrays
+    """
+    kernel = KERNELS[name]
+    outputs = {}
+    for i, case in enumerate(kernel["cases"]()):
+        for j, array in enumerate(_as_arrays(kernel[mode](**case))):
+            outputs[f"case{i}_out{j}"] = array
+    return outputs
+
+
+def golden_path(name):
+    """Path of the stored outputs of a kernel"""
+    return os.path.join(GOLDEN_DIR, f"{name}.npz")
+
+
+def load_golden(name):
+    """Stored reference outputs of a kernel"""
+    with np.load(golden_path(name)) as data:
+        return dict(data)
+
+
+def regenerate(names=None):
+    """Store the reference outputs of the kernels"""
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+    for name in names or KERNELS:
+        np.savez_compressed(golden_path(name), **run(name, mode="reference"))
+
+
+def compare(name, expected, actual):
+    """
+    Maximum absolute and relative differences between two sets of
+    outputs, asserting they agree within the kernel tolerances
+    """
+    kernel = KERNELS[name]
+    assert expected.keys() == actual.keys()
+    max_abs, max_rel = 0.0, 0.0
+    for key, value in expected.items():
+        np.testing.assert_allclose(
+            actual[key],
+            value,
+            rtol=kernel["rtol"],
+            atol=kernel["atol"],
+            err_msg=f"{name} {key}",
+        )
+        diff = np.abs(actual[key] - value)
+        max_abs = max(max_abs, float(diff.max(initial=0)))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rel = diff / np.abs(value)
+        max_rel = max(max_rel, float(np.nanmax(rel, initial=0)))
+    return max_abs, max_rel
+
+
+def side_by_side(names=None, repeat=5):
+    """
+    Time both modes of every kernel and report their differences
+    """
+    rows = []
+    for name in names or KERNELS:
+        timings = {}
+        outputs = {}
+        for mode in ["reference", "fast"]:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                outputs[mode] = run(name, mode)
+            timings[mode] = (time.perf_counter() - start) / repeat
+        max_abs, max_rel = compare(name, outputs["reference"], outputs["fast"])
+        rows.append((name, timings["reference"], timings["fast"], max_abs, max_rel))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("kernels", nargs="*", help="any of " + ", ".join(KERNELS))
+    parser.add_argument(
+        "--regenerate",
+        action="store_true",
+        help="store the reference outputs instead of comparing",
+    )
+    args = parser.parse_args()
+    if args.regenerate:
+        regenerate(args.kernels)
+    else:
+        header = f"{'kernel':<18}{'reference [s]':>15}{'fast [s]':>12}{'max abs':>12}{'max rel':>12}"
+        print(header)
+        for row in side_by_side(args.kernels):
+            print(
+                f"{row[0]:<18}{row[1]:>15.5f}{row[2]:>12.5f}{row[3]:>12.2e}{row[4]:>12.2e}"
+            )
@@ -0,0 +1,386 @@
+"""Tests for `dmelon.ocean.argo` module."""
+
+import functools
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+from scipy.io import netcdf_file
+
+from dmelon.ocean import argo
+
+
+class _FlakyHandler(SimpleHTTPRequestHandler):
+    """Local stand-in for the GDAC that fails the first request of some files"""
+
+    failures = {}
+    requests = []
+
+    def do_GET(self):
+        """Serve the file unless it still has failures left"""
+        self.requests.append(self.path)
+        if self.failures.get(self.path, 0) > 0:
+            self.failures[self.path] -= 1
+            self.send_error(503)
+            return
+        super().do_GET()
+
+    def log_message(self, *args):
+        """Keep the test output quiet"""
+
+
+def _write(path, content):
+    """Write a file creating its parents"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+
+
+def _plan(local, *combined):
+    """Plan to sync the given float folders into local"""
+    argo_df = pd.DataFrame({"file": [f"{folder}/profiles/x.nc" for folder in combined]})
+    return argo.build_plan(argo_df, str(local))
+
+
+@pytest.fixture
+def gdac(tmp_path):
+    """Serve a small GDAC tree over HTTP"""
+    root = tmp_path / "remote"
+    _write(root / "dac/aoml/1900001/1900001_prof.nc", b"a" * 100)
+    _write(root / "dac/aoml/1900001/profiles/R1900001_001.nc", b"b" * 50)
+    _write(root / "dac/aoml/1900001/profiles/R1900001_002.nc", b"c" * 70)
+    _write(root / "dac/coriolis/6900001/profiles/D6900001_001.nc", b"d" * 30)
+    _FlakyHandler.failures = {}
+    _FlakyHandler.requests = []
+    handler = functools.partial(_FlakyHandler, directory=str(root))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield root, f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_build_plan():
+    """Float folders are extracted from the index file paths"""
+    argo_df = pd.DataFrame(
+        {
+            "file": [
+                "aoml/1900001/profiles/R1900001_001.nc",
+                "aoml/1900001/profiles/R1900001_002.nc",
+                "coriolis/6900001/profiles/D6900001_001.nc",
+            ],
+        },
+    )
+    plan = argo.build_plan(argo_df, "/gdac")
+    assert plan == [
+        argo.FloatTask(
+            "aoml", "1900001", os.path.join("/gdac", "dac", "aoml", "1900001")
+        ),
+        argo.FloatTask(
+            "coriolis",
+            "6900001",
+            os.path.join("/gdac", "dac", "coriolis", "6900001"),
+        ),
+    ]
+    commands = argo.build_dl(argo_df, "/gdac")
+    assert len(commands) == 2
+    assert commands[1].startswith("screen -dmS auto_coriolis_6900001_")
+    assert ":http:dac/coriolis/6900001 /gdac/dac/coriolis/6900001 -P" in commands[1]
+
+
+def test_sync(gdac, tmp_path):
+    """Floats are mirrored and unchanged files are not transferred again"""
+    root, url = gdac
+    local = tmp_path / "local"
+    sync = argo.ArgoSync(
+        local_root=str(local), base_url=url, max_workers=2, progress=None
+    )
+    summary = sync.sync(_plan(local, "aoml/1900001", "coriolis/6900001"))
+    assert summary["downloaded"] == 4
+    assert summary["bytes"] == 250
+    assert not summary["failed"]
+    for path in root.rglob("*.nc"):
+        mirror = local / path.relative_to(root)
+        assert mirror.read_bytes() == path.read_bytes()
+
+    summary = sync.sync(_plan(local, "aoml/1900001", "coriolis/6900001"))
+    assert summary["downloaded"] == 0
+    assert summary["skipped"] == 4
+
+    modified = root / "dac/aoml/1900001/profiles/R1900001_002.nc"
+    modified.write_bytes(b"e" * 10)
+    mtime = os.path.getmtime(modified) + 10
+    os.utime(modified, (mtime, mtime))
+    summary = sync.sync(_plan(local, "aoml/1900001"))
+    assert summary["downloaded"] == 1
+    assert summary["bytes"] == 10
+
+
+def test_sync_retry_and_delete(gdac, tmp_path):
+    """Server errors are retried and stale local files removed"""
+    root, url = gdac
+    local = tmp_path / "local"
+    _write(local / "dac/aoml/1900001/profiles/R1900001_000.nc", b"old")
+    _FlakyHandler.failures = {"/dac/aoml/1900001/1900001_prof.nc": 2}
+    sync = argo.ArgoSync(
+        local_root=str(local),
+        base_url=url,
+        backoff=0.01,
+        delete=True,
+        progress=None,
+    )
+    summary = sync.sync(_plan(local, "aoml/1900001"))
+    assert summary["downloaded"] == 3
+    assert summary["deleted"] == 1
+    assert _FlakyHandler.requests.count("/dac/aoml/1900001/1900001_prof.nc") == 3
+
+
+def test_sync_failure(gdac, tmp_path):
+    """Floats that keep failing are reported"""
+    _, url = gdac
+    sync = argo.ArgoSync(
+        local_root=str(tmp_path), base_url=url, retries=1, backoff=0.01
+    )
+    summary = sync.sync(_plan(tmp_path, "aoml/0000000", "coriolis/6900001"))
+    assert list(summary["failed"]) == ["aoml/0000000"]
+    assert summary["downloaded"] == 1
+
+
+def test_sync_incremental(gdac, tmp_path):
+    """Only new or updated profiles of the index are transferred"""
+    root, url = gdac
+    argo_df = pd.DataFrame(
+        {
+            "file": [
+                "aoml/1900001/profiles/R1900001_001.nc",
+                "aoml/1900001/profiles/R1900001_002.nc",
+                "coriolis/6900001/profiles/D6900001_001.nc",
+            ],
+            "date_update": pd.to_datetime(["2020-01-01", "2020-01-02", "2020-01-03"]),
+        },
+    )
+    state = argo.ArgoState(str(tmp_path / "state.sqlite"))
+    sync = argo.ArgoSync(
+        local_root=str(tmp_path / "local"), base_url=url, progress=None
+    )
+
+    summary = sync.sync_incremental(argo_df, state)
+    assert summary["downloaded"] == 3
+    assert len(state.to_dataframe()) == 3
+
+    _FlakyHandler.requests = []
+    summary = sync.sync_incremental(argo_df, state)
+    assert summary["files"] == 0
+    assert _FlakyHandler.requests == []
+
+    _write(root / "dac/aoml/1900001/profiles/R1900001_003.nc", b"f" * 5)
+    argo_df.loc[1, "date_update"] = pd.Timestamp("2021-01-01")
+    argo_df.loc[3] = [
+        "aoml/1900001/profiles/R1900001_003.nc",
+        pd.Timestamp("2021-01-01"),
+    ]
+    pending = state.pending(argo_df)
+    assert pending.file.tolist() == argo_df.file[[1, 3]].tolist()
+    summary = sync.sync_incremental(argo_df, state)
+    assert summary["files"] == 2
+    assert not summary["failed"]
+    assert state.pending(argo_df).empty
+
+
+def test_sync_incremental_failure(gdac, tmp_path):
+    """Files that failed are retried in the next run"""
+    _, url = gdac
+    argo_df = pd.DataFrame(
+        {
+            "file": ["aoml/1900001/profiles/R1900001_009.nc"],
+            "date_update": pd.to_datetime(["2020-01-01"]),
+        },
+    )
+    state = argo.ArgoState(str(tmp_path / "state.sqlite"))
+    sync = argo.ArgoSync(
+        local_root=str(tmp_path), base_url=url, retries=0, progress=None
+    )
+    summary = sync.sync_incremental(argo_df, state)
+    assert list(summary["failed"]) == argo_df.file.tolist()
+    assert len(state.pending(argo_df)) == 1
+
+
+@pytest.mark.parametrize(
+    "dates",
+    [
+        ["2020-01-01", "2020-01-02"],
+        ["2020-01-01", "2020-01-02 12:30:00"],
+    ],
+)
+def test_state_dates_round_trip(tmp_path, dates):
+    """Recorded files are not pending again, even with midnight-only dates"""
+    argo_df = pd.DataFrame(
+        {
+            "file": [
+                "aoml/1900001/profiles/R1900001_001.nc",
+                "aoml/1900001/profiles/R1900001_002.nc",
+            ],
+            "date_update": pd.to_datetime(dates, format="ISO8601"),
+        },
+    )
+    state = argo.ArgoState(str(tmp_path / "state.sqlite"))
+    state.update(list(zip(argo_df.file, argo_df.date_update)))
+    assert state.pending(argo_df).empty
+    argo_df.loc[0, "date_update"] += pd.Timedelta("1D")
+    assert state.pending(argo_df).file.tolist() == argo_df.file[:1].tolist()
+
+
+def _profile_file(path, wmo, cycle, mode, pres, temp, qc=None):
+    """Write a minimal ARGO profile file with a secondary profile"""
+    nlev = len(pres)
+    qc = np.array([list(qc or "1" * nlev)] * 2, dtype="S1")
+    with netcdf_file(path, "w") as nc:
+        nc.createDimension("N_PROF", 2)
+        nc.createDimension("N_LEVELS", nlev)
+        nc.createDimension("STRING8", 8)
+        variables = {
+            "DATA_MODE": ("c", ("N_PROF",), np.array([mode, "R"], dtype="S1")),
+            "PLATFORM_NUMBER": (
+                "c",
+                ("N_PROF", "STRING8"),
+                np.array([list(f"{wmo:<8}")] * 2, dtype="S1"),
+            ),
+            "CYCLE_NUMBER": ("i", ("N_PROF",), [cycle, cycle]),
+            "JULD": ("d", ("N_PROF",), [25000.5, 25000.5]),
+            "LATITUDE": ("d", ("N_PROF",), [-5.0, -5.0]),
+            "LONGITUDE": ("d", ("N_PROF",), [-85.0, -85.0]),
+            "PRES": ("f", ("N_PROF", "N_LEVELS"), [pres, pres]),
+            "TEMP": ("f", ("N_PROF", "N_LEVELS"), np.array([temp, temp]) + 100),
+            "TEMP_QC": ("c", ("N_PROF", "N_LEVELS"), qc),
+            "PRES_ADJUSTED": ("f", ("N_PROF", "N_LEVELS"), [pres, pres]),
+            "TEMP_ADJUSTED": ("f", ("N_PROF", "N_LEVELS"), [temp, temp]),
+            "TEMP_ADJUSTED_QC": ("c", ("N_PROF", "N_LEVELS"), qc),
+        }
+        for name, (dtype, dims, values) in variables.items():
+            nc.createVariable(name, dtype, dims)[:] = values
+        nc.variables["JULD"].units = "days since 1950-01-01 00:00:00 UTC"
+
+
+def test_interp_levels():
+    """Vectorized interpolation matches np.interp profile by profile"""
+    rng = np.random.default_rng(0)
+    pres = np.sort(rng.uniform(0, 2100, (30, 60)), axis=1)
+    values = rng.standard_normal((30, 60))
+    pres[rng.random(pres.shape) < 0.1] = np.nan
+    values[rng.random(values.shape) < 0.05] = np.nan
+    pres[3] = np.nan
+    result = argo.interp_levels(pres, values, argo.STANDARD_LEVELS)
+    for i in range(pres.shape[0]):
+        ok = np.isfinite(pres[i]) & np.isfinite(values[i])
+        if not ok.any():
+            assert np.isnan(result[i]).all()
+            continue
+        expected = np.interp(argo.STANDARD_LEVELS, pres[i][ok], values[i][ok])
+        outside = (argo.STANDARD_LEVELS < pres[i][ok].min()) | (
+            argo.STANDARD_LEVELS > pres[i][ok].max()
+        )
+        expected[outside] = np.nan
+        np.testing.assert_allclose(result[i], expected)
+
+
+def test_read_profiles(tmp_path):
+    """Profiles of the local mirror are merged on standard levels"""
+    files = [
+        "aoml/1900001/profiles/D1900001_001.nc",
+        "aoml/1900001/profiles/R1900001_002.nc",
+        "coriolis/6900001/profiles/R6900001_001.nc",
+    ]
+    for file in files:
+        (tmp_path / "dac" / file).parent.mkdir(parents=True, exist_ok=True)
+    _profile_file(
+        tmp_path / "dac" / files[0], 1900001, 1, "D", [5, 15, 25], [20, 18, 16]
+    )
+    _profile_file(
+        tmp_path / "dac" / files[1],
+        1900001,
+        2,
+        "R",
+        [2, 10, 30, 60],
+        [25, 24, 22, 10],
+        qc=["1", "4", "1", "1"],
+    )
+    _profile_file(tmp_path / "dac" / files[2], 6900001, 1, "A", [0, 100], [28, 18])
+    argo_df = pd.DataFrame({"file": files + ["aoml/1900001/profiles/R1900001_003.nc"]})
+
+    with pytest.warns(UserWarning, match="1 profile files are missing"):
+        ds = argo.read_profiles(
+            argo_df,
+            str(tmp_path),
+            levels=[5, 10, 20, 50],
+            max_workers=2,
+            batch_size=2,
+            store=str(tmp_path / "profiles.zarr"),
+        )
+    np.testing.assert_allclose(
+        ds.TEMP,
+        [
+            [20, 19, 17, np.nan],
+            [125 - 9 / 28, 125 - 24 / 28, 125 - 54 / 28, 114],
+            [27.5, 27, 26, 23],
+        ],
+    )
+    assert ds.platform_number.values.tolist() == ["1900001", "1900001", "6900001"]
+    assert ds.cycle_number.values.tolist() == [1, 2, 1]
+    assert np.isnan(ds.PSAL).all()
+    xr.testing.assert_identical(xr.open_zarr(tmp_path / "profiles.zarr").load(), ds)
+
+
+def test_read_profiles_unreadable(tmp_path):
+    """A corrupt profile file is skipped with a warning"""
+    files = [
+        "aoml/1900001/profiles/R1900001_001.nc",
+        "aoml/1900001/profiles/R1900001_002.nc",
+    ]
+    (tmp_path / "dac" / files[0]).parent.mkdir(parents=True)
+    _profile_file(tmp_path / "dac" / files[0], 1900001, 1, "D", [0, 100], [28, 18])
+    (tmp_path / "dac" / files[1]).write_bytes(b"not a netcdf file")
+
+    with pytest.warns(UserWarning, match="Skipping unreadable profile file"):
+        ds = argo.read_profiles(
+            pd.DataFrame({"file": files}),
+            str(tmp_path),
+            levels=[0, 50],
+            max_workers=1,
+            batch_size=1,
+        )
+    assert ds.file.values.tolist() == files[:1]
+    np.testing.assert_allclose(ds.TEMP, [[28, 23]])
+
+
+def test_estimate_transfer(tmp_path):
+    """Job size is estimated from the local files and the state"""
+    argo_df = pd.DataFrame(
+        {
+            "file": [
+                "aoml/1900001/profiles/R1900001_001.nc",
+                "aoml/1900001/profiles/R1900001_002.nc",
+                "coriolis/6900001/profiles/D6900001_001.nc",
+            ],
+            "date_update": pd.to_datetime(["2020-01-01", "2020-01-02", "2020-01-03"]),
+        },
+    )
+    estimate = argo.estimate_transfer(argo_df, str(tmp_path))
+    assert estimate == {
+        "floats": 2,
+        "files": 3 + 2 * argo.FLOAT_FILES_ESTIMATE,
+        "estimated_bytes": 6 * argo.PROFILE_SIZE_ESTIMATE,
+    }
+
+    _write(tmp_path / "dac" / argo_df.file[0], b"a" * 100)
+    _write(tmp_path / "dac/aoml/1900001/1900001_meta.nc", b"m" * 20)
+    estimate = argo.estimate_transfer(argo_df, str(tmp_path))
+    assert estimate == {"floats": 2, "files": 4, "estimated_bytes": 240}
+
+    state = argo.ArgoState(str(tmp_path / "state.sqlite"))
+    state.update([(argo_df.file[0], argo_df.date_update[0]), (argo_df.file[1], None)])
+    estimate = argo.estimate_transfer(argo_df, str(tmp_path), state=state)
+    assert estimate == {"floats": 2, "files": 2, "estimated_bytes": 200}
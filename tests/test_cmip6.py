@@ -0,0 +1,69 @@
+"""Tests for `dmelon.cmip6` module."""
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from dmelon import cmip6
+
+
+def _model_dataset(nx, ny, seed):
+    """Small curvilinear model output"""
+    lon = np.tile(np.linspace(0, 360, nx, endpoint=False), (ny, 1))
+    lat = np.tile(np.linspace(-80, 80, ny)[:, None], (1, nx))
+    data = np.random.default_rng(seed).standard_normal((4, ny, nx))
+    return xr.Dataset(
+        {"tos": (["time", "y", "x"], data)},
+        coords={
+            "lon": (["y", "x"], lon),
+            "lat": (["y", "x"], lat),
+            "time": np.arange(4),
+        },
+    )
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    """Manifest of two models, one of them split in several files"""
+    first = _model_dataset(36, 17, 0)
+    first.to_netcdf(tmp_path / "model_a.nc")
+    second = _model_dataset(24, 12, 1)
+    second.isel(time=slice(0, 2)).to_netcdf(tmp_path / "model_b_1.nc")
+    second.isel(time=slice(2, None)).to_netcdf(tmp_path / "model_b_2.nc")
+    return {
+        "model_a": str(tmp_path / "model_a.nc"),
+        "model_b": str(tmp_path / "model_b_*.nc"),
+    }
+
+
+def test_preprocess_manifest(manifest, tmp_path):
+    """Every dataset is written once and reruns are incremental"""
+    output = tmp_path / "zarr"
+    region = {"lon": (100, 300), "lat": (-20, 20)}
+    summary = cmip6.preprocess_manifest(
+        manifest, str(output), region=region, max_workers=2
+    )
+    assert sorted(summary["processed"]) == ["model_a", "model_b"]
+    assert not summary["failed"]
+    for result in summary["processed"].values():
+        assert result["elapsed"] > 0
+
+    ds = xr.open_zarr(output / "model_b.zarr")
+    assert ds.sizes["time"] == 4
+    assert ds.x.min() >= 100 and ds.x.max() <= 300
+    assert ds.y.min() >= -20 and ds.y.max() <= 20
+
+    rerun = cmip6.preprocess_manifest(manifest, str(output), region=region)
+    assert rerun["skipped"] == ["model_a", "model_b"]
+    assert not rerun["processed"]
+
+
+def test_preprocess_manifest_failure(manifest, tmp_path):
+    """Failed datasets are reported and retried in the next run"""
+    manifest["broken"] = str(tmp_path / "missing.nc")
+    output = str(tmp_path / "zarr")
+    summary = cmip6.preprocess_manifest(manifest, output, max_workers=1)
+    assert list(summary["failed"]) == ["broken"]
+    rerun = cmip6.preprocess_manifest(manifest, output, max_workers=1)
+    assert list(rerun["failed"]) == ["broken"]
+    assert sorted(rerun["skipped"]) == ["model_a", "model_b"]
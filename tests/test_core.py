@@ -0,0 +1,56 @@
+"""Tests for `dmelon.ocean.core` module."""
+
+import numpy as np
+import xarray as xr
+
+from dmelon.ocean import DispersionRelation
+from dmelon.ocean.core import BETA, METERS_PER_DEGREE, SECONDS_PER_DAY, _matsuno
+
+
+def _scaled(curves, name):
+    """Dimensionless wavenumber and frequency of a curve"""
+    c = curves.c
+    k = 2 * np.pi * curves.wavenumber / METERS_PER_DEGREE / np.sqrt(BETA / c)
+    w = curves[name] * 2 * np.pi / SECONDS_PER_DAY / np.sqrt(BETA * c)
+    return k, w
+
+
+def test_curves_solve_matsuno():
+    """Every branch solves the equatorial wave dispersion relation"""
+    curves = DispersionRelation.curves(
+        np.linspace(-1, 1, 51), modes=[1, 2, 3], equivalent_depth=[0.5, 1, 25]
+    )
+    assert curves.inertia_gravity.dims == ("mode", "equivalent_depth", "wavenumber")
+    assert curves.kelvin.dims == ("equivalent_depth", "wavenumber")
+    n = curves.mode
+    for name in ["inertia_gravity", "rossby"]:
+        k, w = _scaled(curves, name)
+        residual = w**3 - (k**2 + 2 * n + 1) * w - k
+        assert np.nanmax(np.abs(residual)) < 1e-8
+    k, w = _scaled(curves, "mrg")
+    np.testing.assert_allclose(w**2 - k * w - 1, 0, atol=1e-10)
+    k, w = _scaled(curves, "kelvin")
+    xr.testing.assert_allclose(w.where(k >= 0), k.where(k >= 0).transpose(*w.dims))
+    # Rossby waves only propagate westward
+    assert curves.rossby.sel(wavenumber=slice(0.01, None)).isnull().all()
+    assert curves.rossby.sel(wavenumber=slice(None, -0.01)).notnull().all()
+
+
+def test_curves_long_wave_limit():
+    """The Rossby branch tends to the long wave approximation of low_freq"""
+    w, k = DispersionRelation.low_freq(1)
+    small = np.abs(np.arange(-10, 10, 0.1)) < 0.5
+    curves = DispersionRelation.curves(k[small & (k < 0)], modes=[1])
+    np.testing.assert_allclose(
+        curves.rossby[0, 0], w[small & (k < 0)], rtol=1e-2, atol=1e-12
+    )
+
+
+def test_curves_memoized():
+    """Repeated calls reuse the computation but return independent copies"""
+    _matsuno.cache_clear()
+    first = DispersionRelation.curves(modes=[1, 2])
+    first["kelvin"][:] = 0
+    second = DispersionRelation.curves(modes=np.array([1, 2]))
+    assert _matsuno.cache_info().hits == 1
+    assert second.kelvin.max() > 0
@@ -0,0 +1,16 @@
+"""Golden-output regression tests for the numerical kernels."""
+
+import golden
+import pytest
+
+
+@pytest.mark.parametrize("name", list(golden.KERNELS))
+def test_reference_matches_golden(name):
+    """The frozen reference implementations reproduce the stored outputs"""
+    golden.compare(name, golden.load_golden(name), golden.run(name, "reference"))
+
+
+@pytest.mark.parametrize("name", list(golden.KERNELS))
+def test_fast_matches_golden(name):
+    """The package implementations match the stored outputs"""
+    golden.compare(name, golden.load_golden(name), golden.run(name, "fast"))
@@ -0,0 +1,61 @@
+"""Import time tests for `dmelon` package."""
+
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ["cartopy", "geopandas", "pandas", "scipy", "torch", "xarray"]
+
+
+def _importtime(statement):
+    """Modules imported by a statement in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import dmelon",
+        "import dmelon.ocean",
+        "import dmelon.spectral",
+        "import dmelon.plotting",
+    ],
+)
+def test_import_is_lazy(statement):
+    """Importing the packages does not pull the heavy dependencies"""
+    modules = _importtime(statement)
+    assert "dmelon" in modules
+    loaded = {name.split(".")[0] for name in modules}
+    assert loaded.isdisjoint(HEAVY_MODULES)
+
+
+def test_argo_import_skips_xarray():
+    """The ARGO download tools only import xarray to read profiles"""
+    modules = _importtime("import dmelon.ocean.argo")
+    assert "dmelon.ocean.argo" in modules
+    assert "xarray" not in modules
+
+
+def test_submodules_on_access():
+    """Submodules are still reachable as attributes"""
+    import dmelon
+
+    assert "statistics" in dir(dmelon)
+    assert dmelon.statistics.edof is not None
+    assert dmelon.spectral.filters.lanczosfilter is not None
+    with pytest.raises(AttributeError):
+        dmelon.missing
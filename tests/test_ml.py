@@ -0,0 +1,178 @@
+"""Tests for `dmelon.ml` module."""
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from dmelon.ml import EarlyStopping  # noqa: E402
+
+
+@pytest.fixture
+def model():
+    """Small model whose weights change every epoch"""
+    torch.manual_seed(0)
+    return torch.nn.Linear(4, 2)
+
+
+def _train(stopper, model, losses):
+    """Feed a sequence of validation losses, changing the weights each time"""
+    for loss in losses:
+        with torch.no_grad():
+            model.weight.add_(1.0)
+        stopper(loss, model)
+        if stopper.early_stop:
+            break
+
+
+@pytest.mark.parametrize("async_save", [False, True])
+def test_checkpoint_keeps_best_state(model, tmp_path, async_save):
+    """The checkpoint on disk holds the weights of the best epoch"""
+    path = tmp_path / "checkpoint.pt"
+    stopper = EarlyStopping(patience=2, path=str(path), async_save=async_save)
+    _train(stopper, model, [1.0, 0.5, 0.4, 0.6, 0.7, 0.8])
+    assert stopper.early_stop
+    saved = torch.load(path)
+    # the best loss was seen on the third epoch
+    assert torch.allclose(saved["weight"], model.weight - 2)
+    assert not (tmp_path / "checkpoint.pt.tmp").exists()
+    if async_save:
+        assert torch.equal(stopper.best_state["weight"], saved["weight"])
+
+
+def test_async_reports_cost(model, tmp_path):
+    """Each checkpoint reports its cost through trace_func"""
+    messages = []
+    stopper = EarlyStopping(
+        path=str(tmp_path / "checkpoint.pt"),
+        trace_func=messages.append,
+        async_save=True,
+    )
+    _train(stopper, model, [1.0, 0.5])
+    stopper.flush()
+    assert sum("copy to memory" in message for message in messages) == 2
+    assert any("written to" in message for message in messages)
+    assert not any("decreased" in message for message in messages)
+
+    # synchronous checkpoints stay quiet unless asked for
+    messages.clear()
+    stopper = EarlyStopping(path=str(tmp_path / "quiet.pt"), trace_func=messages.append)
+    _train(stopper, model, [1.0, 0.5])
+    assert messages == []
+    stopper = EarlyStopping(
+        path=str(tmp_path / "sync.pt"), trace_func=messages.append, report_cost=True
+    )
+    _train(stopper, model, [1.0, 0.5])
+    assert sum("Checkpoint took" in message for message in messages) == 2
+
+
+def test_async_close(model, tmp_path):
+    """The best state is on disk when training ends without early stopping"""
+    path = tmp_path / "checkpoint.pt"
+    with EarlyStopping(path=str(path), async_save=True, report_cost=False) as stopper:
+        _train(stopper, model, [1.0, 0.5, 0.6])
+        writer = stopper._writer
+    assert not stopper.early_stop
+    assert not writer.is_alive()
+    assert torch.equal(torch.load(path)["weight"], stopper.best_state["weight"])
+    stopper.close()
+
+
+def test_async_written_at_exit(tmp_path):
+    """The atexit hook writes the last state of an unclosed stopper"""
+    import subprocess
+    import sys
+
+    path = tmp_path / "checkpoint.pt"
+    script = (
+        "import torch\n"
+        "from dmelon.ml import EarlyStopping\n"
+        f"stopper = EarlyStopping(path={str(path)!r}, async_save=True)\n"
+        "stopper(1.0, torch.nn.Linear(2000, 2000))\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True)
+    assert torch.load(path)["weight"].shape == (2000, 2000)
+
+
+def test_async_write_error(model, tmp_path):
+    """Errors of the background writer are raised on flush"""
+    stopper = EarlyStopping(
+        path=str(tmp_path / "missing" / "checkpoint.pt"), async_save=True
+    )
+    stopper(1.0, model)
+    with pytest.raises(Exception):
+        stopper.flush()
+
+
+@pytest.fixture
+def field():
+    """Small (time, lat, lon) field with a few missing values"""
+    import numpy as np
+    import xarray as xr
+
+    rng = np.random.default_rng(0)
+    data = rng.standard_normal((50, 3, 4))
+    data[:, 0, 0] = np.nan
+    return xr.DataArray(data, dims=["time", "lat", "lon"]).chunk({"time": 8})
+
+
+def test_window_dataset_samples(field):
+    """Windows and lead-time targets match a direct slice of the field"""
+    import numpy as np
+
+    from dmelon.ml import WindowDataset, normalization_stats
+
+    stats = normalization_stats(field)
+    dataset = WindowDataset(field, steps=5, lead=[1, 10], stats=stats, cache_size=2)
+    assert dataset.chunk_size == 8
+    assert len(dataset) == 50 - 5 - 10 + 1
+    normed = ((field - stats["mean"]) / stats["std"]).fillna(0).values
+    for index in [0, 3, 7, 20, len(dataset) - 1]:
+        x, y = dataset[index]
+        assert x.dtype == torch.float32
+        np.testing.assert_allclose(
+            x.numpy(), normed[index : index + 5], rtol=1e-5, atol=1e-6
+        )
+        np.testing.assert_allclose(
+            y.numpy(), normed[[index + 5, index + 14]], rtol=1e-5, atol=1e-6
+        )
+    assert len(dataset._state()["cache"]) <= dataset.cache_size
+    with pytest.raises(IndexError):
+        dataset[len(dataset)]
+
+
+def test_window_dataset_samples_are_copies(field):
+    """Changing a sample in place leaves the cached chunks untouched"""
+    from dmelon.ml import WindowDataset
+
+    dataset = WindowDataset(field, steps=3, lead=1)
+    x, y = dataset[2]
+    expected_x, expected_y = x.clone(), y.clone()
+    x.zero_()
+    y.zero_()
+    x, y = dataset[2]
+    assert torch.equal(x, expected_x)
+    assert torch.equal(y, expected_y)
+
+
+def test_chunk_sampler(field):
+    """The sampler visits every sample once, chunk by chunk"""
+    from torch.utils.data import DataLoader
+
+    from dmelon.ml import ChunkSampler, WindowDataset
+
+    dataset = WindowDataset(field, steps=3, lead=2)
+    sampler = ChunkSampler(dataset, seed=1)
+    indices = list(sampler)
+    assert sorted(indices) == list(range(len(dataset)))
+    chunks = [dataset.chunk_of(index) for index in indices]
+    assert [
+        chunk for i, chunk in enumerate(chunks) if i == 0 or chunk != chunks[i - 1]
+    ] == list(sampler.order)
+    sampler.set_epoch(1)
+    assert list(sampler) != indices
+
+    loader = DataLoader(dataset, batch_size=4, sampler=sampler, num_workers=2)
+    batches = list(loader)
+    assert sum(len(x) for x, _ in batches) == len(dataset)
+    assert batches[0][0].shape == (4, 3, 3, 4)
+    assert batches[0][1].shape == (4, 3, 4)
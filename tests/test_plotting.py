@@ -0,0 +1,95 @@
+"""Tests for `dmelon.plotting` module."""
+
+import numpy as np
+import pytest
+
+ccrs = pytest.importorskip("cartopy.crs")
+cfeature = pytest.importorskip("cartopy.feature")
+
+from shapely.geometry import box  # noqa: E402
+
+from dmelon import plotting  # noqa: E402
+
+LON = np.arange(-100, -60, 2.0)
+LAT = np.arange(-20, 10, 2.0)
+
+
+def _draw(ax, frame):
+    """Draw a synthetic field"""
+    ax.pcolormesh(LON, LAT, frame, transform=ccrs.PlateCarree())
+
+
+@pytest.fixture
+def land():
+    """Offline stand-in for the Natural Earth borders"""
+    return cfeature.ShapelyFeature([box(-82, -20, -60, 10)], ccrs.PlateCarree())
+
+
+def test_lazy_borders():
+    """Module level borders are built once on first access"""
+    assert plotting.SD_BORDER is plotting.SD_BORDER
+    assert plotting.HQ_BORDER.scale == "10m"
+    with pytest.raises(AttributeError):
+        plotting.LQ_BORDER
+
+
+def test_projected_borders_cached(land):
+    """Borders are projected once per projection and extent"""
+    proj = ccrs.PlateCarree(central_longitude=180)
+    extent = (-100, -60, -20, 10)
+    geoms = plotting.projected_borders(proj, extent, land)
+    assert len(geoms) == 1
+    assert (
+        plotting.projected_borders(
+            ccrs.PlateCarree(central_longitude=180), extent, land
+        )
+        is geoms
+    )
+
+
+def test_render_maps(land, tmp_path, monkeypatch):
+    """Frames are rendered in parallel and assembled into an animation"""
+    Image = pytest.importorskip("PIL.Image")
+    closed = []
+    image_close = Image.Image.close
+
+    def recording_close(self):
+        """Count the images closed"""
+        closed.append(self)
+        image_close(self)
+
+    monkeypatch.setattr(Image.Image, "close", recording_close)
+    rng = np.random.default_rng(0)
+    frames = [rng.standard_normal((LAT.size - 1, LON.size - 1)) for _ in range(6)]
+    paths = plotting.render_maps(
+        frames,
+        _draw,
+        str(tmp_path / "maps"),
+        extent=(-100, -60, -20, 10),
+        borders=land,
+        max_workers=2,
+        animation=str(tmp_path / "maps.gif"),
+        lon_step=10,
+        lat_step=10,
+    )
+    assert [p.rsplit("/", 1)[-1] for p in paths] == [
+        f"frame_{i:04d}.png" for i in range(6)
+    ]
+    for path in paths:
+        with open(path, "rb") as f:
+            assert f.read(8) == b"\x89PNG\r\n\x1a\n"
+    assert (tmp_path / "maps.gif").stat().st_size > 0
+    assert len(closed) == 6
+
+
+def test_render_maps_empty(land, tmp_path):
+    """No frames renders nothing and writes no animation"""
+    paths = plotting.render_maps(
+        [],
+        _draw,
+        str(tmp_path / "maps"),
+        borders=land,
+        animation=str(tmp_path / "maps.gif"),
+    )
+    assert paths == []
+    assert not (tmp_path / "maps.gif").exists()
@@ -0,0 +1,47 @@
+"""Tests for `dmelon.spectral.power` module."""
+
+import numpy as np
+import pytest
+import xarray as xr
+from scipy.signal import get_window, welch
+
+from dmelon import statistics
+from dmelon.spectral.power import multitaper_spectrum, welch_spectrum
+
+
+@pytest.fixture
+def field():
+    """White noise field with a land point"""
+    rng = np.random.default_rng(0)
+    data = 2 * rng.standard_normal((1024, 2, 3))
+    data[:, 0, 0] = np.nan
+    return xr.DataArray(data, dims=["time", "lat", "lon"])
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_welch_spectrum(field, chunked):
+    """Every grid point matches scipy with edof based limits"""
+    data = field.chunk({"lat": 1, "lon": 2}) if chunked else field
+    spectra = welch_spectrum(data, dt=0.5, nperseg=128, noverlap=96).compute()
+    assert spectra.power.dims == ("lat", "lon", "frequency")
+    assert spectra.power.isel(lat=0, lon=0).isnull().all()
+
+    freq, expected = welch(field[:, 1, 2], fs=2, nperseg=128, noverlap=96)
+    np.testing.assert_allclose(spectra.frequency, freq)
+    np.testing.assert_allclose(spectra.power[1, 2], expected)
+    dof = statistics.edof(1024, get_window("hann", 128), 96)
+    assert spectra.attrs["edof"] == pytest.approx(dof)
+    valid = spectra.isel(lat=1)
+    assert (valid.lower < valid.power).all() and (valid.power < valid.upper).all()
+
+
+def test_multitaper_spectrum(field):
+    """Multitaper spectra keep the variance and have 2K degrees of freedom"""
+    spectra = multitaper_spectrum(field.chunk({"lat": 1}), NW=3).compute()
+    assert spectra.attrs["edof"] == 10
+    df = float(spectra.frequency[1] - spectra.frequency[0])
+    variance = (spectra.power * df).sum("frequency").isel(lat=1)
+    np.testing.assert_allclose(variance, field.isel(lat=1).var("time"), rtol=0.05)
+    # white noise spectra lie within the limits at most frequencies
+    inside = (spectra.lower < 8) & (8 < spectra.upper)
+    assert inside.isel(lat=1).mean() > 0.9
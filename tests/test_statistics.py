@@ -0,0 +1,177 @@
+"""Tests for `dmelon.statistics` module."""
+
+import numpy as np
+import pytest
+import xarray as xr
+from scipy.signal import get_window
+
+from dmelon import statistics
+from dmelon.spectral.wavelet.wt import ar1nv
+
+
+def _edof_loop(N, window, overlap):
+    """Original segment-by-segment implementation of `edof`"""
+    window = window / np.linalg.norm(window)
+    nskip = window.size - overlap
+    nseg = np.ceil(N / nskip) + 1
+    num = 2 * nseg
+    den = 0
+    for m in range(1, np.around(nseg).astype(int)):
+        upper_limit = m * nskip
+        b = np.zeros_like(window)
+        b[: len(window[upper_limit:])] = window[upper_limit:]
+        den += (1 - (m / nseg)) * np.dot(window, b) ** 2
+    den = 1 + 2 * den
+    return num / den
+
+
+@pytest.mark.parametrize("name", ["hann", "hamming"])
+@pytest.mark.parametrize("nperseg", [64, 255, 512])
+@pytest.mark.parametrize("fraction", [0, 0.25, 0.5, 0.75, 0.9])
+@pytest.mark.parametrize("N", [1000, 9131])
+def test_edof_matches_loop(name, nperseg, fraction, N):
+    """The vectorized edof must reproduce the original loop"""
+    window = get_window(name, nperseg)
+    overlap = int(nperseg * fraction)
+    np.testing.assert_allclose(
+        statistics.edof(N, window, overlap),
+        _edof_loop(N, window, overlap),
+        rtol=1e-10,
+    )
+
+
+def test_edof_no_overlap():
+    """Without overlap every segment is independent"""
+    window = get_window("hann", 100)
+    nseg = np.ceil(1000 / 100) + 1
+    assert statistics.edof(1000, window, 0) == pytest.approx(2 * nseg)
+
+
+@pytest.fixture
+def ar1_field():
+    """Synthetic AR(1) field [time, lat, lon] with varying persistence"""
+    rng = np.random.default_rng(0)
+    nt, ny, nx = 400, 4, 5
+    phi = np.linspace(0, 0.9, ny * nx).reshape(ny, nx)
+    data = np.empty((nt, ny, nx))
+    data[0] = rng.standard_normal((ny, nx))
+    for i in range(1, nt):
+        data[i] = phi * data[i - 1] + rng.standard_normal((ny, nx))
+    return xr.DataArray(
+        data,
+        coords=[
+            ("time", np.arange(nt)),
+            ("lat", np.arange(ny)),
+            ("lon", np.arange(nx)),
+        ],
+    )
+
+
+def test_ar1_matches_ar1nv(ar1_field):
+    """The gridded AR(1) fit must match the single series estimate"""
+    fit = statistics.ar1(ar1_field)
+    g, a = ar1nv(ar1_field.isel(lat=2, lon=3))
+    assert fit.g.isel(lat=2, lon=3).item() == pytest.approx(g)
+    assert fit.a.isel(lat=2, lon=3).item() == pytest.approx(a)
+
+
+def test_autocorrelation_direct(ar1_field):
+    """FFT autocorrelation must match the direct lagged products"""
+    acf = statistics.autocorrelation(ar1_field, nlags=5)
+    x = ar1_field.isel(lat=1, lon=1).data
+    x = x - x.mean()
+    N = x.size
+    expected = [x[: N - k].dot(x[k:]) / (N - k) / (x.dot(x) / N) for k in range(6)]
+    np.testing.assert_allclose(acf.isel(lat=1, lon=1), expected)
+
+
+def test_dask_matches_numpy(ar1_field):
+    """Dask backed computations must match the in-memory ones"""
+    chunked = ar1_field.chunk({"time": 100, "lat": 2, "lon": 2})
+    xr.testing.assert_allclose(
+        statistics.autocorrelation(chunked, nlags=3).compute(),
+        statistics.autocorrelation(ar1_field, nlags=3),
+    )
+    xr.testing.assert_allclose(
+        statistics.effective_sample_size(chunked).compute(),
+        statistics.effective_sample_size(ar1_field),
+    )
+
+
+def test_correlation_significance(ar1_field):
+    """Persistence must reduce the effective sample size"""
+    other = ar1_field.copy(data=np.roll(ar1_field.data, 1, axis=1))
+    result = statistics.correlation_significance(ar1_field, other)
+    assert (result.neff <= ar1_field.sizes["time"]).all()
+    assert result.neff.isel(lat=-1, lon=-1) < result.neff.isel(lat=0, lon=0)
+    same = statistics.correlation_significance(ar1_field, ar1_field)
+    assert same.significant.all()
+
+
+@pytest.fixture
+def mode_field():
+    """Three known modes plus noise over a partly masked grid"""
+    rng = np.random.default_rng(0)
+    nt, ny, nx = 240, 12, 15
+    lat = np.linspace(-40, 40, ny)
+    patterns = rng.standard_normal((3, ny, nx))
+    pcs = rng.standard_normal((nt, 3)) * [5, 3, 2]
+    data = np.einsum("tk,kyx->tyx", pcs, patterns)
+    data += 0.3 * rng.standard_normal((nt, ny, nx))
+    data[:, :2, :3] = np.nan
+    data[5, -1, -1] = np.nan
+    return xr.DataArray(
+        data,
+        coords=[("time", np.arange(nt)), ("lat", lat), ("lon", np.arange(nx))],
+    )
+
+
+@pytest.mark.parametrize("method", ["tsqr", "randomized"])
+def test_eof_matches_numpy_svd(mode_field, method):
+    """Leading modes must match the SVD of the weighted, masked anomalies"""
+    nt = mode_field.sizes["time"]
+    X = mode_field.values.reshape(nt, -1)
+    valid = ~np.isnan(X).any(axis=0)
+    w = np.sqrt(np.cos(np.deg2rad(mode_field.lat.values)))
+    w = np.broadcast_to(w[:, np.newaxis], mode_field.shape[1:]).ravel()
+    X = X[:, valid] * w[valid]
+    X = X - X.mean(axis=0)
+    U, S, Vt = np.linalg.svd(X, full_matrices=False)
+
+    result = statistics.eof(
+        mode_field.chunk(time=60), neofs=3, method=method, n_power_iter=4
+    )
+    assert result.attrs["method"] == method
+    np.testing.assert_allclose(result.eigenvalues, S[:3] ** 2 / (nt - 1))
+    np.testing.assert_allclose(result.variance_fraction, S[:3] ** 2 / (S**2).sum())
+    eofs = result.eofs.values.reshape(3, -1)
+    assert np.isnan(eofs[:, ~valid]).all()
+    sign = np.sign((eofs[:, valid] * Vt[:3]).sum(axis=1))
+    np.testing.assert_allclose(eofs[:, valid] * sign[:, np.newaxis], Vt[:3], atol=1e-8)
+    np.testing.assert_allclose(result.pcs * sign, U[:, :3] * S[:3], atol=1e-8)
+    np.testing.assert_allclose(
+        result.eigenvalue_error, result.eigenvalues * np.sqrt(2 / nt)
+    )
+
+
+def test_eof_method_choice(mode_field):
+    """TSQR is only picked when the R factor is not larger than a chunk"""
+    single = statistics.eof(mode_field, neofs=2)
+    assert single.attrs["method"] == "tsqr"
+    chunked = statistics.eof(mode_field.chunk(time=60), neofs=2)
+    assert chunked.attrs["method"] == "randomized"
+    assert (single.eofs.sum(["lat", "lon"]) > 0).all()
+    xr.testing.assert_allclose(single.eigenvalues, chunked.eigenvalues)
+    with pytest.raises(ValueError, match="Unknown method"):
+        statistics.eof(mode_field, method="dense")
+
+
+def test_eof_latitude_name(mode_field):
+    """The coslat weights use the latitude coordinate given by name"""
+    renamed = mode_field.rename(lat="latitude")
+    with pytest.raises(ValueError, match="No latitude coordinate 'lat'"):
+        statistics.eof(renamed, neofs=2)
+    xr.testing.assert_allclose(
+        statistics.eof(renamed, neofs=2, lat="latitude").eigenvalues,
+        statistics.eof(mode_field, neofs=2).eigenvalues,
+    )
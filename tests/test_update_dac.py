@@ -0,0 +1,180 @@
+"""Tests for the `bin/update_dac.py` command line utility."""
+
+import importlib.util
+import json
+import os
+import sys
+import types
+
+import pandas as pd
+import pytest
+
+from dmelon.ocean import argo
+
+INDEX = pd.DataFrame(
+    {
+        "file": [
+            "aoml/1900001/profiles/R1900001_001.nc",
+            "aoml/1900001/profiles/R1900001_002.nc",
+            "coriolis/6900001/profiles/D6900001_001.nc",
+        ],
+        "date_update": pd.to_datetime(["2020-01-01", "2020-01-02", "2020-01-03"]),
+    },
+)
+
+
+class _IndexFetcher:
+    """Stand-in for the argopy index fetcher returning a fixed index"""
+
+    calls = []
+
+    def region(self, region):
+        """Index of a region"""
+        self.calls.append(("region", region))
+        return self
+
+    def float(self, floats):
+        """Index of a list of floats"""
+        self.calls.append(("floats", floats))
+        return self
+
+    def to_dataframe(self):
+        """The fixed index"""
+        return INDEX.copy()
+
+
+@pytest.fixture
+def update_dac(monkeypatch):
+    """The update_dac script with argopy replaced by a stub index"""
+    stub = types.ModuleType("argopy")
+    stub.set_options = lambda **kwargs: None
+    stub.IndexFetcher = _IndexFetcher
+    monkeypatch.setitem(sys.modules, "argopy", stub)
+    _IndexFetcher.calls = []
+    path = os.path.join(os.path.dirname(__file__), os.pardir, "bin", "update_dac.py")
+    spec = importlib.util.spec_from_file_location("update_dac", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_get_args(update_dac):
+    """Every option reaches the parsed arguments"""
+    args = update_dac.getArgs(
+        ["floats", "-l", "1900001", "6900001", "-i", "-n", "-j", "3"]
+        + ["-d", "/tmp/gdac", "-s", "/tmp/state.sqlite", "--json", "-"],
+    )
+    assert args.kind == "floats"
+    assert args.list == ["1900001", "6900001"]
+    assert args.incremental and args.dry_run
+    assert args.max_transfers == 3
+    assert args.target == "/tmp/gdac"
+    assert args.state == "/tmp/state.sqlite"
+    assert args.json == "-"
+
+    args = update_dac.getArgs(["region", "-l", "-90", "-70", "-20", "0"])
+    assert not args.incremental and not args.dry_run
+    assert args.max_transfers == 8
+    assert args.target == update_dac.ARGO_localFTP
+    assert args.state is None and args.json is None
+
+
+def test_main_dry_run(update_dac, tmp_path):
+    """A dry run reports the estimate of both modes without transferring"""
+    report_path = tmp_path / "report.json"
+    report = update_dac.main(
+        "region",
+        ["-90", "-70", "-20", "0", "2020-01"],
+        dry_run=True,
+        target=str(tmp_path),
+        json_path=str(report_path),
+    )
+    assert _IndexFetcher.calls == [("region", [-90.0, -70.0, -20.0, 0.0, "2020-01"])]
+    assert json.loads(report_path.read_text()) == report
+    assert report["mode"] == "full"
+    assert report["target"] == str(tmp_path)
+    assert report["floats"] == 2
+    assert report["files"] == 3 + 2 * argo.FLOAT_FILES_ESTIMATE
+    assert "sync_seconds" not in report
+    assert not (tmp_path / "dac").exists()
+
+    state_path = tmp_path / "state.sqlite"
+    argo.ArgoState(str(state_path)).update([(INDEX.file[0], INDEX.date_update[0])])
+    report = update_dac.main(
+        "floats",
+        ["1900001", "6900001"],
+        incremental=True,
+        dry_run=True,
+        target=str(tmp_path),
+        state_path=str(state_path),
+    )
+    assert report["mode"] == "incremental"
+    assert report["files"] == 2
+    assert report["estimated_bytes"] == 2 * argo.PROFILE_SIZE_ESTIMATE
+
+
+class _Engine:
+    """Stand-in for ArgoSync recording the jobs it is given"""
+
+    instances = []
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.jobs = []
+        self.instances.append(self)
+
+    def _summary(self, files):
+        """Summary of a job where every file was downloaded"""
+        return {
+            "files": files,
+            "downloaded": files,
+            "bytes": 10 * files,
+            "failed": {},
+            "elapsed": 0.5,
+        }
+
+    def sync(self, plan):
+        """Record a full job"""
+        self.jobs.append(("full", [task.combined for task in plan]))
+        return self._summary(len(plan))
+
+    def sync_incremental(self, argo_df, state):
+        """Record an incremental job"""
+        self.jobs.append(("incremental", state.path))
+        return self._summary(len(state.pending(argo_df)))
+
+
+def test_main_sync(update_dac, tmp_path, monkeypatch, capsys):
+    """A real run hands the plan to the sync engine and reports its summary"""
+    _Engine.instances = []
+    monkeypatch.setattr(update_dac, "ArgoSync", _Engine)
+    target = str(tmp_path / "local")
+    report = update_dac.main(
+        "floats", ["1900001", "6900001"], max_transfers=2, target=target, json_path="-"
+    )
+    (engine,) = _Engine.instances
+    assert engine.kwargs["local_root"] == target
+    assert engine.kwargs["max_workers"] == 2
+    assert engine.jobs == [("full", ["aoml/1900001", "coriolis/6900001"])]
+    assert report["mode"] == "full"
+    assert report["downloaded"] == 2
+    assert report["sync_seconds"] == 0.5
+    assert "elapsed" not in report
+    engine.kwargs["progress"]("[1/2] aoml/1900001: done")
+    output = capsys.readouterr()
+    assert json.loads(output.out) == report
+    assert "Syncing 2 floats" in output.err
+    assert "[1/2] aoml/1900001" in output.err
+
+    state_path = str(tmp_path / "state.sqlite")
+    report = update_dac.main(
+        "floats",
+        ["1900001"],
+        incremental=True,
+        target=target,
+        state_path=state_path,
+    )
+    assert _Engine.instances[-1].jobs == [("incremental", state_path)]
+    assert report["mode"] == "incremental"
+    assert report["files"] == 3
+    assert "Done:" in capsys.readouterr().out
@@ -0,0 +1,189 @@
+"""Tests for `dmelon.utils` module."""
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+from geopandas.tools import sjoin
+from shapely.geometry import Polygon, box
+
+from dmelon import utils
+
+
+@pytest.fixture
+def argo_index():
+    """Synthetic ARGO index with a shuffled index"""
+    rng = np.random.default_rng(42)
+    size = 5000
+    return pd.DataFrame(
+        {
+            "file": [f"aoml/{i}/profiles/R{i}_001.nc" for i in range(size)],
+            "longitude": rng.uniform(-180, 180, size),
+            "latitude": rng.uniform(-60, 60, size),
+        },
+        index=rng.permutation(size),
+    )
+
+
+@pytest.fixture
+def regions():
+    """Overlapping regions, one of them not rectangular"""
+    return gpd.GeoDataFrame(
+        {"region": ["nino34", "nino3", "coast"]},
+        geometry=[
+            box(-170, -5, -120, 5),
+            box(-150, -5, -90, 5),
+            Polygon([(-90, -20), (-70, -20), (-75, 0), (-85, 0)]),
+        ],
+        crs="EPSG:4326",
+        index=[10, 3, 7],
+    )
+
+
+def _reference(pandas_df, shape_df, crs="EPSG:4326"):
+    """Spatial join over every point of the DataFrame"""
+    geodf = gpd.GeoDataFrame(
+        pandas_df,
+        geometry=gpd.points_from_xy(pandas_df.longitude, pandas_df.latitude, crs=crs),
+    )
+    return sjoin(geodf, shape_df, predicate="within", how="inner")
+
+
+@pytest.mark.parametrize("chunksize", [1_000_000, 777])
+def test_findPointsInPolys_matches_sjoin(argo_index, regions, chunksize):
+    """The fast path must reproduce the spatial join"""
+    result = utils.findPointsInPolys(argo_index, regions, chunksize=chunksize)
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(result),
+        pd.DataFrame(_reference(argo_index, regions)),
+    )
+
+
+def test_findPointsInPolys_column_suffixes(argo_index, regions):
+    """Columns present in both frames get the sjoin suffixes"""
+    argo_index["region"] = "none"
+    result = utils.findPointsInPolys(argo_index, regions)
+    expected = _reference(argo_index, regions)
+    assert result.columns.tolist() == expected.columns.tolist()
+    pd.testing.assert_frame_equal(pd.DataFrame(result), pd.DataFrame(expected))
+
+
+def test_findPointsInPolys_empty(argo_index):
+    """Shapes outside the data return an empty frame"""
+    far = gpd.GeoDataFrame(geometry=[box(0, 80, 10, 85)], crs="EPSG:4326")
+    assert utils.findPointsInPolys(argo_index, far).empty
+
+
+def test_findPointsInPolys_cache(argo_index, regions, tmp_path, monkeypatch):
+    """Cached queries only classify the newly appended profiles"""
+    old, appended = argo_index.iloc[:4000], argo_index.iloc[4000:]
+    first = utils.findPointsInPolys(old, regions, cache_dir=tmp_path)
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(first), pd.DataFrame(_reference(old, regions))
+    )
+
+    tested = []
+    original = utils._points_in_polys_index
+
+    def spy(lon, *args, **kwargs):
+        tested.append(lon.size)
+        return original(lon, *args, **kwargs)
+
+    monkeypatch.setattr(utils, "_points_in_polys_index", spy)
+    result = utils.findPointsInPolys(argo_index, regions, cache_dir=tmp_path)
+    assert tested == [len(appended)]
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(result),
+        pd.DataFrame(_reference(argo_index, regions)),
+    )
+
+    subset = utils.findPointsInPolys(appended, regions, cache_dir=tmp_path)
+    assert tested == [len(appended)]
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(subset),
+        pd.DataFrame(_reference(appended, regions)),
+    )
+
+
+def test_findPointsInPolys_cache_per_geometry(argo_index, regions, tmp_path):
+    """Different shapes are cached separately"""
+    utils.findPointsInPolys(argo_index, regions, cache_dir=tmp_path)
+    utils.findPointsInPolys(argo_index, regions.iloc[:1], cache_dir=tmp_path)
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def _replace_reference(ds):
+    """Previous implementation of `replace_x_y_nominal_lat_lon`"""
+    ds = ds.copy()
+
+    def maybe_fix_non_unique(data, pad=False):
+        if len(data) == len(np.unique(data)):
+            return data
+        if pad:
+            if len(np.unique([data[0:2]])) < 2:
+                data[0] = -90
+            if len(np.unique([data[-2:]])) < 2:
+                data[-1] = 90
+        ii_range = np.arange(len(data))
+        _, indicies = np.unique(data, return_index=True)
+        double_idx = np.array([ii not in indicies for ii in ii_range])
+        data[double_idx] = np.interp(
+            ii_range[double_idx],
+            ii_range[~double_idx],
+            data[~double_idx],
+        )
+        return data
+
+    eq_idx = len(ds.y) // 2
+    nominal_x = ds.isel(y=eq_idx).lon.load()
+    nominal_y = ds.lat.max("x").load()
+    nominal_x = utils._interp_nominal_lon(nominal_x.data)
+    nominal_y = nominal_y.interpolate_na("y").data
+    nominal_y = maybe_fix_non_unique(nominal_y)
+    nominal_x = maybe_fix_non_unique(nominal_x)
+    ds = ds.assign_coords(x=nominal_x, y=nominal_y)
+    ds = ds.sortby("x")
+    ds = ds.sortby("y")
+    return ds.assign_coords(
+        x=maybe_fix_non_unique(ds.x.load().data.copy()),
+        y=maybe_fix_non_unique(ds.y.load().data.copy(), pad=True),
+    )
+
+
+@pytest.fixture
+def curvilinear_ds():
+    """Tripolar-like grid with gaps, repeated values and a shifted seam"""
+    nx, ny = 36, 20
+    lon_1d = np.roll(np.linspace(0, 350, nx), 5)
+    lat_1d = np.linspace(-80, 89, ny)
+    lat_1d[-3:] = 89
+    lat_1d[:2] = -80
+    lon = np.tile(lon_1d, (ny, 1))
+    lon[ny // 2, 7] = np.nan
+    lat = np.tile(lat_1d[:, None], (1, nx))
+    lat[4, :] = np.nan
+    data = np.random.default_rng(1).standard_normal((3, ny, nx))
+    return xr.Dataset(
+        {"tos": (["time", "y", "x"], data)},
+        coords={
+            "lon": (["y", "x"], lon),
+            "lat": (["y", "x"], lat),
+            "x": np.arange(nx),
+            "y": np.arange(ny),
+        },
+    )
+
+
+@pytest.mark.parametrize("chunks", [None, {"x": 10, "y": 7}])
+def test_replace_x_y_nominal_lat_lon(curvilinear_ds, chunks):
+    """The vectorized fix must match the previous implementation"""
+    expected = _replace_reference(curvilinear_ds)
+    if chunks is not None:
+        curvilinear_ds = curvilinear_ds.chunk(chunks)
+    result = utils.replace_x_y_nominal_lat_lon(curvilinear_ds)
+    if chunks is not None:
+        assert result.tos.chunks is not None
+    xr.testing.assert_identical(result.compute(), expected)
+    assert result.indexes["x"].is_unique
+    assert result.indexes["y"].is_monotonic_increasing
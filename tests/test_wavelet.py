@@ -0,0 +1,146 @@
+"""Tests for `dmelon.spectral.wavelet` module."""
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from dmelon.spectral.wavelet import (
+    WaveletMonitor,
+    global_wavelet_spectrum,
+    scale_averaged_power,
+    wavelet,
+)
+from dmelon.spectral.wavelet.core import wave_signif
+from dmelon.spectral.wavelet.wt import ar1nv
+
+
+@pytest.fixture
+def field():
+    """Red noise series on a small grid with a land point"""
+    rng = np.random.default_rng(0)
+    noise = rng.standard_normal((512, 3, 4))
+    data = np.empty_like(noise)
+    data[0] = noise[0]
+    for i in range(1, 512):
+        data[i] = 0.6 * data[i - 1] + noise[i]
+    data[:, 0, 0] = np.nan
+    return xr.DataArray(
+        data,
+        coords=[
+            ("time", pd.date_range("2000-01-01", periods=512)),
+            ("lat", [-1.0, 0.0, 1.0]),
+            ("lon", [180.0, 181.0, 182.0, 183.0]),
+        ],
+    )
+
+
+def test_wavelet_batched(field):
+    """The transform of stacked series matches the one of each series"""
+    series = field.isel(lat=1).values.T
+    wave = wavelet(series, 1, pad=True, dj=1 / 12)[0]
+    for i, x in enumerate(series):
+        np.testing.assert_allclose(wave[i], wavelet(x, 1, pad=True, dj=1 / 12)[0])
+
+
+def test_wave_signif_band():
+    """Scale-averaged significance only uses the scales inside [S1, S2]"""
+    scale = 2 * 2.0 ** (np.arange(0, 61) / 12)
+    narrow = wave_signif(1.0, 1, scale, sigtest=2, lag1=0.5, dof=[2, 8])
+    wide = wave_signif(1.0, 1, scale, sigtest=2, lag1=0.5, dof=[16, 64])
+    assert narrow != wide
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_global_wavelet_spectrum(field, chunked):
+    """Every grid point matches the 1-d transform and wave_signif"""
+    data = field.chunk({"lat": 1}) if chunked else field
+    gws = global_wavelet_spectrum(data).compute()
+    assert gws.power.dims == ("lat", "lon", "period")
+    assert gws.power.isel(lat=0, lon=0).isnull().all()
+
+    x = field.isel(lat=2, lon=1)
+    wave, period, scale, _ = wavelet(x.values, 1, pad=True, dj=1 / 12)
+    np.testing.assert_allclose(gws.period, period)
+    np.testing.assert_allclose(
+        gws.power.isel(lat=2, lon=1), (np.abs(wave) ** 2).mean(-1)
+    )
+    lag1, _ = ar1nv(x)
+    signif = wave_signif(
+        float(x.var(ddof=1)), 1, scale, sigtest=1, lag1=lag1, dof=x.size - scale
+    )
+    np.testing.assert_allclose(gws.signif.isel(lat=2, lon=1), signif)
+
+
+def test_scale_averaged_power(field):
+    """Scale averages match Eqn(24) and wave_signif with sigtest=2"""
+    band = [8, 32]
+    averaged = scale_averaged_power(field, band, lag1=0.6)
+    assert averaged.power.dims == field.dims
+    assert averaged.signif.dims == ("lat", "lon")
+
+    x = field.isel(lat=1, lon=3)
+    wave, _, scale, _ = wavelet(x.values, 1, pad=True, dj=1 / 12)
+    avg = (scale >= band[0]) & (scale <= band[1])
+    expected = (np.abs(wave[avg]) ** 2 / scale[avg, np.newaxis]).sum(0) / 12 / 0.776
+    np.testing.assert_allclose(averaged.power.isel(lat=1, lon=3), expected)
+    signif = wave_signif(float(x.var(ddof=1)), 1, scale, sigtest=2, lag1=0.6, dof=band)
+    np.testing.assert_allclose(averaged.signif.isel(lat=1, lon=3), signif)
+
+    with pytest.raises(ValueError):
+        scale_averaged_power(field, [0.1, 0.5])
+
+
+def test_wavelet_monitor():
+    """Online coefficients match the FFT transform and do not depend on batching"""
+    rng = np.random.default_rng(2)
+    x = np.cumsum(rng.standard_normal(700)) * 0.1 + rng.standard_normal(700)
+    monitor = WaveletMonitor(s0=4, J1=36, mean=x.mean())
+    newest = [monitor.update(value) for value in x[:300]]
+    monitor.extend(x[300:650])
+    for value in x[650:]:
+        newest.append(monitor.update(value))
+
+    batch = WaveletMonitor(s0=4, J1=36, mean=x.mean())
+    batch.extend(x)
+    np.testing.assert_allclose(
+        monitor.coefficients.wave, batch.coefficients.wave, atol=1e-12
+    )
+    np.testing.assert_allclose(newest[-1], batch.coefficients.wave[:, 0], atol=1e-12)
+
+    coefficients = batch.coefficients
+    assert coefficients.coi[:, 0].all()
+    assert not coefficients.coi[:, -1].any()
+    wave, period = wavelet(x, 1, pad=True, dj=1 / 12, s0=4, J1=36)[:2]
+    np.testing.assert_allclose(coefficients.period, period)
+    expected = wave[:, x.size - 1 - coefficients.lag.values]
+    scale = np.abs(wave).max(axis=1, keepdims=True)
+    np.testing.assert_allclose(coefficients.wave / scale, expected / scale, atol=1e-3)
+
+
+def test_wavelet_monitor_start():
+    """Times before the first value are missing and the first ones in the COI"""
+    monitor = WaveletMonitor(s0=4, J1=12)
+    monitor.extend([1.0, -1.0, 0.5])
+    coefficients = monitor.coefficients
+    assert coefficients.wave[:, 3:].isnull().all()
+    assert coefficients.coi[:, :3].all()
+
+
+@pytest.mark.parametrize("pad, n", [(True, 6000), (False, 3072), (False, 6144)])
+@pytest.mark.parametrize("oversample, bound", [(4, 5e-4), (8, 5e-5)])
+def test_wavelet_decimate(oversample, bound, pad, n):
+    """The multirate transform stays within its documented error bound"""
+    rng = np.random.default_rng(1)
+    x = np.empty((2, n))
+    x[:, 0] = 0
+    noise = rng.standard_normal((2, n))
+    # strongly red series, whose largest scales are the hardest to decimate
+    for i in range(1, n):
+        x[:, i] = 0.99 * x[:, i - 1] + noise[:, i]
+    exact = wavelet(x, 1, pad=pad, dj=1 / 12)
+    fast = wavelet(x, 1, pad=pad, dj=1 / 12, decimate=True, oversample=oversample)
+    for a, b in zip(exact[1:], fast[1:]):
+        np.testing.assert_allclose(a, b)
+    error = np.abs(fast[0] - exact[0]).max(axis=-1) / np.abs(exact[0]).max(axis=-1)
+    assert error.max() < bound